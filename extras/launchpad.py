@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import argparse
-from collections import defaultdict
+import difflib
 import json
 import os
 import subprocess
 import sqlite3
-from time import sleep
+from time import monotonic, sleep
+import uuid
 
 import yaml
 
@@ -19,6 +20,18 @@ BLUE = '\033[94m'
 ENDC = '\033[0m'
 
 
+# The namespace used to generate deterministic UUIDs for layout items
+UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'https://github.com/fgimian/macbuild/launchpad')
+
+
+# The UUIDs of the root and holding pages which are never part of a layout
+HOLDING_PAGES = [
+    'ROOTPAGE', 'HOLDINGPAGE',
+    'ROOTPAGE_DB', 'HOLDINGPAGE_DB',
+    'ROOTPAGE_VERS', 'HOLDINGPAGE_VERS'
+]
+
+
 class Types(object):
     ROOT = 1
     FOLDER_ROOT = 2
@@ -40,9 +53,16 @@ def batch(items, batch_size):
         yield items[index:min(index + batch_size, length)]
 
 
-def generate_uuid():
-    """Generate a UUID using uuidgen."""
-    return subprocess.check_output('uuidgen').decode('utf-8').strip()
+def generate_uuid(path=None):
+    """
+    Generate an uppercase UUID in the same format as uuidgen.
+
+    :param path: If provided, a deterministic UUID is derived from this layout path so that an
+                 identical layout always produces identical UUIDs.
+    """
+    if path is None:
+        return str(uuid.uuid4()).upper()
+    return str(uuid.uuid5(UUID_NAMESPACE, path)).upper()
 
 
 def get_launchpad_db_dir():
@@ -53,6 +73,83 @@ def get_launchpad_db_dir():
     return os.path.join(darwin_user_dir, 'com.apple.dock.launchpad', 'db')
 
 
+def get_launchpad_db_state(launchpad_db_dir):
+    """
+    Determines whether the Launchpad database has been created and populated by the Dock.
+
+    :param launchpad_db_dir: The directory containing the Launchpad database.
+
+    :return: None if the database is not yet ready, otherwise the sizes and modification times of
+             the db and db-wal files (which can be compared to check that writes have settled).
+    """
+    launchpad_db_path = os.path.join(launchpad_db_dir, 'db')
+
+    state = []
+    for launchpad_db_file in ['db', 'db-wal']:
+        try:
+            stat = os.stat(os.path.join(launchpad_db_dir, launchpad_db_file))
+            state.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            if launchpad_db_file == 'db':
+                return None
+            state.append(None)
+
+    try:
+        conn = sqlite3.connect(f'file:{launchpad_db_path}?mode=ro', uri=True)
+        try:
+            tables = {
+                name for name, in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            if not {'items', 'apps', 'widgets', 'groups', 'dbinfo'}.issubset(tables):
+                return None
+
+            apps_count, = conn.execute('SELECT COUNT(*) FROM apps').fetchone()
+            if not apps_count:
+                return None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+    return tuple(state)
+
+
+def wait_for_launchpad_db(launchpad_db_dir, timeout=30.0, initial_delay=0.05, max_delay=0.5):
+    """
+    Waits for the Dock to create and populate a fresh Launchpad database, polling with an
+    exponential backoff until the database is populated and its files have stopped changing.
+
+    :param launchpad_db_dir: The directory containing the Launchpad database.
+    :param timeout: The maximum number of seconds to wait.
+    :param initial_delay: The initial number of seconds to wait between checks.
+    :param max_delay: The maximum number of seconds to wait between checks.
+
+    :raises TimeoutError: If the database is not ready before the timeout.
+    """
+    deadline = monotonic() + timeout
+    delay = initial_delay
+    previous_state = None
+
+    while True:
+        state = get_launchpad_db_state(launchpad_db_dir)
+        if state is not None and state == previous_state:
+            return
+
+        previous_state = state
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            raise TimeoutError(
+                f'The Launchpad database in {launchpad_db_dir} was not ready after {timeout} '
+                'seconds'
+            )
+
+        sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
 def get_mapping(conn, table):
     """
     Obtain a mapping between app ids and their titles.
@@ -116,22 +213,26 @@ def add_missing_items(layout, mapping):
                 title = item
                 items_in_layout.append(title)
 
-    # Determine which items are missing from the layout provided
-    missing_items = set(mapping.keys()).difference(items_in_layout)
+    # Determine which items are missing from the layout provided (sorted so that the pages they
+    # are added to are identical between runs)
+    missing_items = sorted(set(mapping.keys()).difference(items_in_layout))
 
     # If missing items are found, notify the user and add them to the layout
     if missing_items:
-        for missing_items_batch in batch(list(missing_items), 30):
+        for missing_items_batch in batch(missing_items, 30):
             layout.append(missing_items_batch)
 
     return missing_items
 
 
-def setup_items(conn, type_, layout, mapping, group_id, root_parent_id):
+def setup_items(
+    type_, layout, mapping, group_id, root_parent_id, rows, deterministic=False, existing=None
+):
     """
-    Manipulates the appropriate database table to layout the items as requested by the user.
+    Determines the database rows required to layout the items as requested by the user.  No
+    database changes are made, the rows are instead added to the rows provided so that they may
+    be written in a single transaction using write_rows.
 
-    :param conn: The SQLite connection.
     :param type_: The type of item being manipulated (usually Types.APP or Types.WIDGET)
     :param layout: The layout requested by the user provided as a list (pages) of lists (items)
                    whereby items are strings.  If the item is a folder, then it is to be a dict
@@ -139,37 +240,45 @@ def setup_items(conn, type_, layout, mapping, group_id, root_parent_id):
     :param mapping: The title to data mapping for the respective items being setup.
     :param group_id: The group id to continue from when adding groups.
     :param root_parent_id: The root parent id to add child items to.
+    :param rows: The rows to be written as returned by new_rows.
+    :param deterministic: Whether or not to derive the UUIDs of pages and folders from their
+                          position in the layout.
+    :param existing: A mapping between (parent_id, ordering, type) and (id, title) of the pages
+                     and folders currently in the database.  When provided, pages and folders
+                     in the same position are re-used rather than being added.
 
     :return: The resultant group id after additions to continue working from.
     """
-    cursor = conn.cursor()
+    def add_group(group_type, flags, parent_id, ordering, title, *path):
+        nonlocal group_id
 
-    # Iterate through pages
-    for page_ordering, page in enumerate(layout):
+        # Re-use the existing page or folder in this position if possible
+        if existing and (parent_id, ordering, group_type) in existing:
+            existing_id, existing_title = existing[parent_id, ordering, group_type]
+            rows['kept'].append(existing_id)
+            if existing_title != title:
+                rows['titles'].append((title, existing_id))
+            return existing_id
 
-        # Start a new page (note that the ordering starts at 1 instead of 0 as there is a
-        # holding page at an ordering of 0)
         group_id += 1
 
-        cursor.execute('''
-            INSERT INTO items
-            (rowid, uuid, flags, type, parent_id, ordering)
-            VALUES
-            (?, ?, 2, ?, ?, ?)
-        ''', (group_id, generate_uuid(), Types.PAGE, root_parent_id, page_ordering + 1)
-        )
+        if deterministic:
+            uuid = generate_uuid('/'.join(str(component) for component in (type_,) + path))
+        else:
+            uuid = generate_uuid()
 
-        cursor.execute('''
-            INSERT INTO groups
-            (item_id, category_id, title)
-            VALUES
-            (?, null, null)
-        ''', (group_id,)
-        )
-        conn.commit()
+        rows['items'].append((group_id, uuid, flags, group_type, parent_id, ordering))
+        rows['groups'].append((group_id, title))
+        return group_id
+
+    # Iterate through pages
+    for page_ordering, page in enumerate(layout):
 
-        # Capture the group id of the page to be used for child items
-        page_parent_id = group_id
+        # Start a new page (note that the ordering starts at 1 instead of 0 as there is a
+        # holding page at an ordering of 0) and capture its group id to be used for child items
+        page_parent_id = add_group(
+            Types.PAGE, 2, root_parent_id, page_ordering + 1, None, page_ordering
+        )
 
         # Iterate through items
         item_ordering = 0
@@ -179,54 +288,22 @@ def setup_items(conn, type_, layout, mapping, group_id, root_parent_id):
                 folder_title = item['folder_title']
                 folder_layout = item['folder_layout']
 
-                # Start a new folder
-                group_id += 1
-
-                cursor.execute('''
-                    INSERT INTO items
-                    (rowid, uuid, flags, type, parent_id, ordering)
-                    VALUES
-                    (?, ?, 0, ?, ?, ?)
-                ''', (group_id, generate_uuid(), Types.FOLDER_ROOT, page_parent_id, item_ordering)
-                )
-
-                cursor.execute('''
-                    INSERT INTO groups
-                    (item_id, category_id, title)
-                    VALUES
-                    (?, null, ?)
-                    ''', (group_id, folder_title)
+                # Start a new folder and capture its group id to be used for child items
+                folder_root_parent_id = add_group(
+                    Types.FOLDER_ROOT, 0, page_parent_id, item_ordering, folder_title,
+                    page_ordering, item_ordering, folder_title
                 )
-                conn.commit()
 
+                folder_ordering = item_ordering
                 item_ordering += 1
 
-                # Capture the group id of the folder root to be used for child items
-                folder_root_parent_id = group_id
-
                 # Iterate through folder pages
                 for folder_page_ordering, folder_page in enumerate(folder_layout):
                     # Start a new folder page
-                    group_id += 1
-
-                    cursor.execute('''
-                        INSERT INTO items
-                        (rowid, uuid, flags, type, parent_id, ordering)
-                        VALUES
-                        (?, ?, 2, ?, ?, ?)
-                    ''', (
-                        group_id, generate_uuid(), Types.PAGE, folder_root_parent_id,
-                        folder_page_ordering)
-                    )
-
-                    cursor.execute('''
-                        INSERT INTO groups
-                        (item_id, category_id, title)
-                        VALUES
-                        (?, null, null)
-                    ''', (group_id,)
+                    folder_page_id = add_group(
+                        Types.PAGE, 2, folder_root_parent_id, folder_page_ordering, None,
+                        page_ordering, folder_ordering, folder_title, folder_page_ordering
                     )
-                    conn.commit()
 
                     # Iterate through folder items
                     folder_item_ordering = 0
@@ -236,24 +313,9 @@ def setup_items(conn, type_, layout, mapping, group_id, root_parent_id):
                             continue
 
                         item_id, uuid, flags = mapping[title]
-                        cursor.execute('''
-                            UPDATE items
-                            SET uuid = ?,
-                                flags = ?,
-                                type = ?,
-                                parent_id = ?,
-                                ordering = ?
-                            WHERE rowid = ?
-                        ''', (
-                                uuid,
-                                flags,
-                                type_,
-                                group_id,
-                                folder_item_ordering,
-                                item_id
-                            )
+                        rows['updates'].append(
+                            (uuid, flags, type_, folder_page_id, folder_item_ordering, item_id)
                         )
-                        conn.commit()
 
                         folder_item_ordering += 1
 
@@ -265,31 +327,128 @@ def setup_items(conn, type_, layout, mapping, group_id, root_parent_id):
                     continue
 
                 item_id, uuid, flags = mapping[title]
-                cursor.execute('''
-                    UPDATE items
-                    SET uuid = ?,
-                        flags = ?,
-                        type = ?,
-                        parent_id = ?,
-                        ordering = ?
-                    WHERE rowid = ?
-                ''', (
-                        uuid,
-                        flags,
-                        type_,
-                        page_parent_id,
-                        item_ordering,
-                        item_id
-                    )
+                rows['updates'].append(
+                    (uuid, flags, type_, page_parent_id, item_ordering, item_id)
                 )
-                conn.commit()
 
                 item_ordering += 1
 
     return group_id
 
 
-def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
+def new_rows():
+    """Creates an empty set of rows to be populated by setup_items and written by write_rows."""
+    return {
+        # (rowid, uuid, flags, type, parent_id, ordering) of each group item to be inserted
+        'items': [],
+        # (item_id, title) of each group to be inserted
+        'groups': [],
+        # (uuid, flags, type, parent_id, ordering, rowid) of each app or widget to be moved
+        'updates': [],
+        # (title, item_id) of each existing group to be renamed
+        'titles': [],
+        # (rowid,) of each existing group to be deleted
+        'deletes': [],
+        # The rowid of each existing group which is re-used
+        'kept': []
+    }
+
+
+def write_rows(conn, rows):
+    """
+    Writes the rows determined by setup_items into the database.  The caller is responsible for
+    committing the transaction.
+
+    :param conn: The SQLite connection.
+    :param rows: The rows to be written as returned by new_rows.
+    """
+    conn.executemany('''
+        INSERT INTO items
+        (rowid, uuid, flags, type, parent_id, ordering)
+        VALUES
+        (?, ?, ?, ?, ?, ?)
+    ''', rows['items'])
+
+    conn.executemany('''
+        INSERT INTO groups
+        (item_id, category_id, title)
+        VALUES
+        (?, null, ?)
+    ''', rows['groups'])
+
+    conn.executemany('''
+        UPDATE items
+        SET uuid = ?,
+            flags = ?,
+            type = ?,
+            parent_id = ?,
+            ordering = ?
+        WHERE rowid = ?
+    ''', rows['updates'])
+
+    conn.executemany('''
+        UPDATE groups
+        SET title = ?
+        WHERE item_id = ?
+    ''', rows['titles'])
+
+    conn.executemany('''
+        DELETE FROM items
+        WHERE rowid = ?
+    ''', rows['deletes'])
+
+
+def get_roots(conn):
+    """
+    Obtains the root ids of the Launchpad apps and Dashboard widgets.
+
+    :param conn: The SQLite connection.
+
+    :return: A tuple containing the Launchpad root id and the Dashboard root id.
+    """
+    cursor = conn.execute('''
+        SELECT key, value
+        FROM dbinfo
+        WHERE key IN ('launchpad_root', 'dashboard_root');
+    ''')
+
+    roots = dict(cursor.fetchall())
+    return int(roots['launchpad_root']), int(roots['dashboard_root'])
+
+
+def get_groups(conn):
+    """
+    Obtains the current pages and folders along with the position of every item.
+
+    :param conn: The SQLite connection.
+
+    :return: A tuple with two items.  The first value is a dict mapping (parent_id, ordering, type)
+             to (id, title) for each page and folder.  The second value is a dict mapping the id
+             of every item to its (type, parent_id, ordering).
+    """
+    cursor = conn.execute('''
+        SELECT items.rowid, items.uuid, items.type, items.parent_id, items.ordering,
+               groups.title
+        FROM items
+        LEFT JOIN groups ON groups.item_id = items.rowid
+    ''')
+
+    groups = {}
+    positions = {}
+
+    for id, item_uuid, type_, parent_id, ordering, title in cursor:
+        positions[id] = (type_, parent_id, ordering)
+
+        if type_ in (Types.PAGE, Types.FOLDER_ROOT) and item_uuid not in HOLDING_PAGES:
+            groups.setdefault((parent_id, ordering, type_), (id, title))
+
+    return groups, positions
+
+
+def build_launchpad(
+    config, rebuild_db=True, restart_upon_completion=True, deterministic_uuids=False,
+    incremental=False
+):
     """
     Builds the requested layout for both the Launchpad apps and Dashboard widgets by updating
     the user's Launchpad SQlite database.
@@ -297,6 +456,13 @@ def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
     :param config: The path containing a YAML or JSON Launchpad configuration.
     :param rebuild_db: Whether or not to re-build the Launchpad database before starting.
     :param restart_upon_completion: Whether or not to restart Launchpad services upon completion.
+    :param deterministic_uuids: Whether or not to derive UUIDs from the layout so that rebuilding
+                                an identical layout produces an identical database.
+    :param incremental: Whether or not to only apply the differences between the current layout
+                        and the requested layout (rather than rebuilding all pages and folders).
+                        The database is never re-built in this mode.
+
+    :return: True if any changes were made to the database.
     """
     widget_layout = config['widget_layout']
     app_layout = config['app_layout']
@@ -308,7 +474,7 @@ def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
     print(f'{BLUE}Using Launchpad database {launchpad_db_path}{ENDC}')
 
     # Re-build the user's database if requested
-    if rebuild_db:
+    if rebuild_db and not incremental:
         # Delete original Launchpad database and rebuild it for a fresh start
         print(f'{BLUE}Deleting Launchpad database files to perform database rebuild{ENDC}')
         for launchpad_db_file in ['db', 'db-shm', 'db-wal']:
@@ -320,7 +486,9 @@ def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
         # Restart the Dock to get a freshly built database to work from
         print(f'{BLUE}Restarting the Dock to build a fresh Launchpad databases{ENDC}')
         subprocess.call(['killall', 'Dock'])
-        sleep(3)
+
+        print(f'{BLUE}Waiting for the Dock to populate the Launchpad database{ENDC}')
+        wait_for_launchpad_db(launchpad_db_dir)
 
     # Connect to the Launchpad SQLite database
     conn = sqlite3.connect(launchpad_db_path)
@@ -347,29 +515,77 @@ def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
         for missing_app_item in missing_app_items:
             print(f'{RED}- {missing_app_item}{ENDC}')
 
-    # Grab a cursor for our operations
-    cursor = conn.cursor()
+    # Determine all the rows required for the new layout before touching the database
+    rows = new_rows()
 
-    print(f'{BLUE}Rebuilding the Launchpad database{ENDC}')
+    if incremental:
+        print(f'{BLUE}Determining the changes required to the Launchpad layout{ENDC}')
+        launchpad_root, dashboard_root = get_roots(conn)
+        existing, positions = get_groups(conn)
 
-    # Clear all items related to groups so we can re-create them
-    cursor.execute('''
-        DELETE FROM items
-        WHERE type IN (?, ?, ?)
-    ''', (Types.ROOT, Types.FOLDER_ROOT, Types.PAGE))
-    conn.commit()
-
-    # Disable triggers on the items table temporarily so that we may create the rows with our
-    # required ordering (including items which have an ordering of 0)
-    cursor.execute('''
-        UPDATE dbinfo
-        SET value = 1
-        WHERE key = 'ignore_items_update_triggers'
-    ''')
-    conn.commit()
+        # Pages and folders are created after all existing items
+        group_id = max(positions)
+
+        group_id = setup_items(
+            Types.WIDGET, widget_layout, widget_mapping, group_id, dashboard_root, rows,
+            deterministic=deterministic_uuids, existing=existing
+        )
+        group_id = setup_items(
+            Types.APP, app_layout, app_mapping, group_id, launchpad_root, rows,
+            deterministic=deterministic_uuids, existing=existing
+        )
+
+        # Only move items which are not already in their requested position and delete any
+        # pages and folders which are no longer used
+        rows['updates'] = [
+            update for update in rows['updates']
+            if positions.get(update[5]) != (update[2], update[3], update[4])
+        ]
+        kept = set(rows['kept'])
+        rows['deletes'] = [
+            (id,) for (parent_id, ordering, type_), (id, title) in existing.items()
+            if id not in kept
+        ]
+
+        if not any(rows[key] for key in ['items', 'updates', 'titles', 'deletes']):
+            print(f'{GREEN}The Launchpad layout is already up to date{ENDC}')
+            conn.close()
+            return False
+
+        print(
+            f'{BLUE}Applying {len(rows["items"])} new pages and folders, '
+            f'{len(rows["updates"])} moved items, {len(rows["titles"])} renamed folders and '
+            f'{len(rows["deletes"])} deleted pages and folders{ENDC}'
+        )
+
+        with conn:
+            # Disable triggers on the items table temporarily so that we may set the ordering
+            conn.execute('''
+                UPDATE dbinfo
+                SET value = 1
+                WHERE key = 'ignore_items_update_triggers'
+            ''')
+
+            write_rows(conn, rows)
+
+            # Enable triggers on the items again so ordering is auto-generated
+            conn.execute('''
+                UPDATE dbinfo
+                SET value = 0
+                WHERE key = 'ignore_items_update_triggers'
+            ''')
+
+        conn.close()
+
+        if restart_upon_completion:
+            # Restart the Dock to that Launchpad can read our updated database
+            print(f'{BLUE}Restarting the Dock to apply the updated database{ENDC}')
+            subprocess.call(['killall', 'Dock'])
+
+        return True
 
     # Add root and holding pages to items and groups
-    for rowid, uuid, type_, parent_id in [
+    for rowid, item_uuid, type_, parent_id in [
         # Root for Launchpad apps
         (1, 'ROOTPAGE', Types.ROOT, 0),
         (2, 'HOLDINGPAGE', Types.PAGE, 1),
@@ -382,104 +598,160 @@ def build_launchpad(config, rebuild_db=True, restart_upon_completion=True):
         (5, 'ROOTPAGE_VERS', Types.ROOT, 0),
         (6, 'HOLDINGPAGE_VERS', Types.PAGE, 5)
     ]:
-        cursor.execute('''
-            INSERT INTO items
-            (rowid, uuid, flags, type, parent_id, ordering)
-            VALUES (?, ?, null, ?, ?, 0)
-        ''', (rowid, uuid, type_, parent_id))
-
-        cursor.execute('''
-            INSERT INTO groups
-            (item_id, category_id, title)
-            VALUES
-            (?, null, null)
-        ''', (rowid,))
-
-        conn.commit()
+        rows['items'].append((rowid, item_uuid, None, type_, parent_id, 0))
+        rows['groups'].append((rowid, None))
 
     # Setup the widgets
     group_id = setup_items(
-        conn, Types.WIDGET, widget_layout, widget_mapping, group_id, root_parent_id=3
+        Types.WIDGET, widget_layout, widget_mapping, group_id, root_parent_id=3, rows=rows,
+        deterministic=deterministic_uuids
     )
 
     # Setup the apps
-    group_id = setup_items(conn, Types.APP, app_layout, app_mapping, group_id, root_parent_id=1)
+    group_id = setup_items(
+        Types.APP, app_layout, app_mapping, group_id, root_parent_id=1, rows=rows,
+        deterministic=deterministic_uuids
+    )
 
-    # Enable triggers on the items again so ordering is auto-generated
-    cursor.execute('''
-        UPDATE dbinfo
-        SET value = 0
-        WHERE key = 'ignore_items_update_triggers'
-    ''')
-    conn.commit()
+    print(f'{BLUE}Rebuilding the Launchpad database{ENDC}')
+
+    # Write the entire layout in a single transaction so that a failure leaves the database
+    # untouched
+    with conn:
+        # Clear all items related to groups so we can re-create them
+        conn.execute('''
+            DELETE FROM items
+            WHERE type IN (?, ?, ?)
+        ''', (Types.ROOT, Types.FOLDER_ROOT, Types.PAGE))
+
+        # Disable triggers on the items table temporarily so that we may create the rows with
+        # our required ordering (including items which have an ordering of 0)
+        conn.execute('''
+            UPDATE dbinfo
+            SET value = 1
+            WHERE key = 'ignore_items_update_triggers'
+        ''')
+
+        write_rows(conn, rows)
+
+        # Enable triggers on the items again so ordering is auto-generated
+        conn.execute('''
+            UPDATE dbinfo
+            SET value = 0
+            WHERE key = 'ignore_items_update_triggers'
+        ''')
+
+    conn.close()
 
     if restart_upon_completion:
         # Restart the Dock to that Launchpad can read our new and updated database
         print(f'{BLUE}Restarting the Dock to apply the new database{ENDC}')
         subprocess.call(['killall', 'Dock'])
 
+    return True
+
+
+def get_tree(conn, root):
+    """
+    Obtains all items below the root provided in depth-first order using a recursive query.
+    Children are found by joining on parent_id so that SQLite may use the index on that column.
+
+    :param conn: The SQLite connection.
+    :param root: The root id of the tree being obtained.
+
+    :return: A cursor yielding (type, title, depth) for each item whereby the children of a page
+             or folder immediately follow it with a greater depth.
+    """
+    holding_pages = ', '.join('?' for _ in HOLDING_PAGES)
+
+    return conn.execute(f'''
+        WITH RECURSIVE tree (id, type, title, depth, path) AS (
+            SELECT rowid, type, NULL, 0, ''
+            FROM items
+            WHERE rowid = ?
+
+            UNION ALL
+
+            SELECT items.rowid, items.type,
+                   COALESCE(apps.title, widgets.title, groups.title),
+                   tree.depth + 1,
+                   tree.path || printf('%010d%010d.', items.ordering, items.rowid)
+            FROM tree
+            JOIN items ON items.parent_id = tree.id
+            LEFT JOIN apps ON apps.item_id = items.rowid
+            LEFT JOIN widgets ON widgets.item_id = items.rowid
+            LEFT JOIN groups ON groups.item_id = items.rowid
+            WHERE items.uuid NOT IN ({holding_pages})
+        )
+        SELECT type, title, depth
+        FROM tree
+        WHERE depth > 0
+        ORDER BY path
+    ''', [root] + HOLDING_PAGES)
+
 
-def build_layout(root, parent_mapping):
+def build_layout(tree):
     """
-    Builds a data structure containing the layout for a particular type of data.
+    Builds a data structure containing the layout for a particular type of data in a single pass.
+    Pages become lists, folders become dicts with a folder_title and folder_layout (containing
+    the folder's pages) and apps or widgets become their titles.  Folders may be nested to any
+    depth.
 
-    :param root: The root id of the tree being built.
-    :param parent_mapping: The mapping between parent_ids and items.
+    :param tree: The items of the tree in depth-first order as returned by get_tree.
 
     :returns: The layout data structure that was built.
     """
     layout = []
 
-    # Iterate through pages
-    for page_id, _, _, _, _ in parent_mapping[root]:
-        page_items = []
+    # A stack containing the depth and list of children for each page or folder which is the
+    # ancestor of the current item
+    stack = [(0, layout)]
 
-        # Iterate through items
-        for id, type_, app_title, widget_title, group_title in parent_mapping[page_id]:
-            # An app has been encountered which is added to the page
-            if type_ == Types.APP:
-                page_items.append(app_title)
+    for type_, title, depth in tree:
+        # Return to the parent of the current item
+        while stack[-1][0] >= depth:
+            stack.pop()
 
-            # A widget has been encountered which is added to the page
-            elif type_ == Types.WIDGET:
-                page_items.append(widget_title)
+        children = stack[-1][1]
 
-            # A folder has been encountered
-            elif type_ == Types.FOLDER_ROOT:
-                # Start a dict for the folder with its title and layout
-                folder = {
-                    'folder_title': group_title,
-                    'folder_layout': []
-                }
+        # A page has been encountered which is added to the layout or folder
+        if type_ == Types.PAGE:
+            page = []
+            children.append(page)
+            stack.append((depth, page))
 
-                # Iterate through folder pages
-                for folder_page_id, _, _, _, _ in parent_mapping[id]:
-                    folder_page_items = []
+        # A folder has been encountered which contains further pages
+        elif type_ == Types.FOLDER_ROOT:
+            folder = {
+                'folder_title': title,
+                'folder_layout': []
+            }
+            children.append(folder)
+            stack.append((depth, folder['folder_layout']))
 
-                    # Iterate through folder items
-                    for (
-                        folder_item_id, folder_item_type, folder_item_app_title,
-                        folder_widget_title, folder_group_title
-                    ) in parent_mapping[folder_page_id]:
+        # An app or widget has been encountered which is added to the page
+        elif type_ in (Types.APP, Types.WIDGET):
+            children.append(title)
 
-                        # An app has been encountered which is being added to the folder page
-                        if folder_item_type == Types.APP:
-                            folder_page_items.append(folder_item_app_title)
+    return layout
 
-                        # A widget has been encountered which is being added to the folder page
-                        elif folder_item_type == Types.WIDGET:
-                            folder_page_items.append(folder_widget_title)
 
-                    # Add the page to the folder
-                    folder['folder_layout'].append(folder_page_items)
+def extract_layout(conn):
+    """
+    Extracts the current layout of Launchpad apps and Dashboard widgets.
 
-                # Add the folder item to the page
-                page_items.append(folder)
+    :param conn: The SQLite connection.
 
-        # Add the page to the layout
-        layout.append(page_items)
+    :return: A dict containing the app_layout and widget_layout.
+    """
+    # Obtain the root elements for Launchpad apps and Dashboard widgets
+    launchpad_root, dashboard_root = get_roots(conn)
 
-    return layout
+    # Build the current layout and return it to the caller
+    return {
+        'app_layout': build_layout(get_tree(conn, launchpad_root)),
+        'widget_layout': build_layout(get_tree(conn, dashboard_root)),
+    }
 
 
 def extract_launchpad():
@@ -492,57 +764,259 @@ def extract_launchpad():
     # Connect to the Launchpad SQLite database
     conn = sqlite3.connect(launchpad_db_path)
 
-    # Obtain the root elements for Launchpad apps and Dashboard widgets
-    cursor = conn.execute('''
-        SELECT key, value
-        FROM dbinfo
-        WHERE key IN ('launchpad_root', 'dashboard_root');
-    ''')
+    layout = extract_layout(conn)
+    conn.close()
 
-    while True:
-        row = cursor.fetchone()
-        if row is None:
-            break
+    return layout
 
-        key, value = row
-        if key == 'launchpad_root':
-            launchpad_root = int(value)
-        elif key == 'dashboard_root':
-            dashboard_root = int(value)
 
-    # Obtain all items and their associated titles
-    cursor = conn.execute('''
-        SELECT items.rowid, items.parent_id, items.type,
-               apps.title AS app_title,
-               widgets.title AS widget_title,
-               groups.title AS group_title
-        FROM items
-        LEFT JOIN apps ON apps.item_id = items.rowid
-        LEFT JOIN widgets ON widgets.item_id = items.rowid
-        LEFT JOIN groups ON groups.item_id = items.rowid
-        WHERE items.uuid NOT IN ('ROOTPAGE', 'HOLDINGPAGE',
-                                 'ROOTPAGE_DB', 'HOLDINGPAGE_DB',
-                                 'ROOTPAGE_VERS', 'HOLDINGPAGE_VERS')
-        ORDER BY items.parent_id, items.ordering
-    ''')
+def flatten_layout(layout, location=None, entries=None):
+    """
+    Flattens a layout into the location of every app, widget and folder.
 
-    # Build a mapping between the parent_id and the associated items
-    parent_mapping = defaultdict(list)
-    while True:
-        row = cursor.fetchone()
-        if row is None:
-            break
+    :param layout: The layout of pages as used in the config.
+    :param location: The location of the folder containing the layout (None for the top level).
+    :param entries: The dict to add entries to.
+
+    :return: A dict mapping each (kind, title) to a tuple containing its container and position.
+             The container is a tuple of the page number followed by the title and page number of
+             each folder the item is within (all numbers start at 1).
+    """
+    if entries is None:
+        entries = {}
 
-        id, parent_id, type_, app_title, widget_title, group_title = row
-        parent_mapping[parent_id].append((id, type_, app_title, widget_title, group_title))
+    for page_number, page in enumerate(layout, 1):
+        container = (location or ()) + (page_number,)
 
-    # Build the current layout and return it to the caller
-    layout = {
-        'app_layout': build_layout(launchpad_root, parent_mapping),
-        'widget_layout': build_layout(dashboard_root, parent_mapping),
+        for position, item in enumerate(page, 1):
+            if isinstance(item, dict):
+                entries[('folder', item['folder_title'])] = (container, position)
+                flatten_layout(
+                    item['folder_layout'], container + (item['folder_title'],), entries
+                )
+            else:
+                entries[('item', item)] = (container, position)
+
+    return entries
+
+
+def describe_location(container, position=None):
+    """Produces a dict describing the location of an item in a layout."""
+    location = {
+        'page': container[0],
+        'folders': [
+            {'title': title, 'page': page}
+            for title, page in zip(container[1::2], container[2::2])
+        ]
     }
+    if position is not None:
+        location['position'] = position
+    return location
 
-    return layout
+
+def find_folders(layout, location=(), folders=None):
+    """
+    Finds every folder in a layout.
+
+    :param layout: The layout of pages as used in the config.
+    :param location: The location of the folder containing the layout (empty for the top level).
+    :param folders: The dict to add folders to.
+
+    :return: A dict mapping each folder title to a tuple containing its location (as used by
+             flatten_layout) and its layout.
+    """
+    if folders is None:
+        folders = {}
+
+    for page_number, page in enumerate(layout, 1):
+        for item in page:
+            if isinstance(item, dict):
+                folder_location = location + (page_number, item['folder_title'])
+                folders[item['folder_title']] = (folder_location, item['folder_layout'])
+                find_folders(item['folder_layout'], folder_location, folders)
+
+    return folders
+
+
+def match_pages(expected, actual):
+    """
+    Matches the pages of two layouts to each other so that inserting or removing a page doesn't
+    cause every page after it to differ.  Identical pages are matched using the longest matching
+    subsequence and the pages between them are paired to maximise the items they share.
+
+    :param expected: The pages of the layout requested in the config.
+    :param actual: The pages of the layout extracted from the database.
+
+    :return: A list of (expected_page_number, actual_page_number) tuples whereby either is None
+             for a page which only exists in one of the layouts.
+    """
+    def contents(page):
+        return tuple(
+            ('folder', item['folder_title']) if isinstance(item, dict) else ('item', item)
+            for item in page
+        )
+
+    expected_contents = [contents(page) for page in expected]
+    actual_contents = [contents(page) for page in actual]
+
+    matcher = difflib.SequenceMatcher(None, expected_contents, actual_contents, autojunk=False)
+    pairs = []
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            pairs.extend(zip(range(i1 + 1, i2 + 1), range(j1 + 1, j2 + 1)))
+            continue
+
+        # Align the differing pages in order, favouring pairs of pages with items in common
+        # (any pairing is preferred over none as the page then remains in the same place)
+        scores = [[0] * (j2 - j1 + 1) for _ in range(i2 - i1 + 1)]
+        for i in range(1, i2 - i1 + 1):
+            for j in range(1, j2 - j1 + 1):
+                shared = len(
+                    set(expected_contents[i1 + i - 1]) & set(actual_contents[j1 + j - 1])
+                )
+                scores[i][j] = max(
+                    scores[i - 1][j], scores[i][j - 1], scores[i - 1][j - 1] + 2 * shared + 1
+                )
+
+        block_pairs = []
+        i, j = i2 - i1, j2 - j1
+        while i or j:
+            if i and scores[i][j] == scores[i - 1][j]:
+                block_pairs.append((i1 + i, None))
+                i -= 1
+            elif j and scores[i][j] == scores[i][j - 1]:
+                block_pairs.append((None, j1 + j))
+                j -= 1
+            else:
+                block_pairs.append((i1 + i, j1 + j))
+                i -= 1
+                j -= 1
+
+        pairs.extend(reversed(block_pairs))
+
+    return pairs
+
+
+def compare_layouts(expected, actual):
+    """
+    Compares two layouts and determines the apps, widgets and folders which are missing, extra,
+    moved to another page or folder, or reordered within their page.  Pages (including those of
+    folders) are matched to each other first so that a page which is inserted or removed is
+    reported once rather than as every item after it having moved.  Reordering is determined
+    using the longest matching subsequence of each page so that only the items which are out of
+    order are reported.
+
+    :param expected: The layout requested in the config.
+    :param actual: The layout extracted from the database.
+
+    :return: A list of dicts describing each difference found.
+    """
+    expected_entries = flatten_layout(expected)
+    actual_entries = flatten_layout(actual)
+    differences = []
+
+    # Map the containers of the actual layout to the containers of the expected layout which they
+    # correspond to, reporting any pages which only exist in one of the layouts
+    expected_folders = find_folders(expected)
+    actual_folders = find_folders(actual)
+
+    layouts = [((), expected, (), actual)]
+    for title, (actual_location, actual_layout) in actual_folders.items():
+        if title in expected_folders:
+            expected_location, expected_layout = expected_folders[title]
+            layouts.append((expected_location, expected_layout, actual_location, actual_layout))
+
+    expected_containers = {}
+
+    for expected_location, expected_layout, actual_location, actual_layout in layouts:
+        for expected_page, actual_page in match_pages(expected_layout, actual_layout):
+            if actual_page is None:
+                differences.append({
+                    'type': 'missing', 'kind': 'page', 'title': None,
+                    'expected': describe_location(expected_location + (expected_page,))
+                })
+            elif expected_page is None:
+                differences.append({
+                    'type': 'extra', 'kind': 'page', 'title': None,
+                    'actual': describe_location(actual_location + (actual_page,))
+                })
+            else:
+                expected_containers[actual_location + (actual_page,)] = (
+                    expected_location + (expected_page,)
+                )
+
+    actual_containers = {
+        expected_container: actual_container
+        for actual_container, expected_container in expected_containers.items()
+    }
+
+    # Group the items which remain in the same container so their ordering may be compared
+    containers = {}
+
+    for key, (expected_container, expected_position) in expected_entries.items():
+        kind, title = key
+
+        if key not in actual_entries:
+            differences.append({
+                'type': 'missing', 'kind': kind, 'title': title,
+                'expected': describe_location(expected_container, expected_position)
+            })
+            continue
+
+        actual_container, actual_position = actual_entries[key]
+
+        if expected_containers.get(actual_container) != expected_container:
+            differences.append({
+                'type': 'moved', 'kind': kind, 'title': title,
+                'expected': describe_location(expected_container, expected_position),
+                'actual': describe_location(actual_container, actual_position)
+            })
+        else:
+            containers.setdefault(expected_container, []).append(
+                (expected_position, actual_position, key)
+            )
+
+    for key, (actual_container, actual_position) in actual_entries.items():
+        if key not in expected_entries:
+            kind, title = key
+            differences.append({
+                'type': 'extra', 'kind': kind, 'title': title,
+                'actual': describe_location(actual_container, actual_position)
+            })
+
+    # Determine the items which are out of order within each container
+    for container, items in containers.items():
+        expected_order = [key for _, _, key in sorted(items, key=lambda item: item[0])]
+        actual_order = [key for _, _, key in sorted(items, key=lambda item: item[1])]
+        if expected_order == actual_order:
+            continue
+
+        matcher = difflib.SequenceMatcher(None, expected_order, actual_order, autojunk=False)
+        in_order = set()
+        for block in matcher.get_matching_blocks():
+            in_order.update(expected_order[block.a:block.a + block.size])
+
+        for expected_position, actual_position, key in sorted(items):
+            if key not in in_order:
+                kind, title = key
+                differences.append({
+                    'type': 'reordered', 'kind': kind, 'title': title,
+                    'expected': describe_location(container, expected_position),
+                    'actual': describe_location(actual_containers[container], actual_position)
+                })
+
+    return differences
+
+
+def format_location(location):
+    """Formats a location produced by describe_location for display."""
+    description = f'page {location["page"]}'
+    for folder in location['folders']:
+        description += f', folder {folder["title"]} page {folder["page"]}'
+    if 'position' in location:
+        description += f', position {location["position"]}'
+    return description
 
 
 def main():
@@ -555,6 +1029,14 @@ def main():
         'build', help='build the launchpad db using the config provided'
     )
     build_parser.add_argument('config_path', help='the file path of the config to use')
+    build_parser.add_argument(
+        '-d', '--deterministic-uuids', action='store_true',
+        help='derive UUIDs from the layout so identical layouts produce identical databases'
+    )
+    build_parser.add_argument(
+        '-i', '--incremental', action='store_true',
+        help='only apply the changes required instead of rebuilding the entire layout'
+    )
 
     # Create the parser for the extract sub-command
     extract_parser = subparsers.add_parser(
@@ -571,6 +1053,10 @@ def main():
         'compare', help='compare the launchpad db with the config'
     )
     compare_parser.add_argument('config_path', help='the file path of the config to compare')
+    compare_parser.add_argument(
+        '-f', '--format', choices=['json', 'text'], default='text',
+        help='the format to display differences in'
+    )
 
     # Parse arguments
     args = parser.parse_args()
@@ -578,16 +1064,28 @@ def main():
     if not args.command:
         parser.error('please specify an action to perform')
 
-    print()
-    print(f'{BOLD}Launchpad Builder{ENDC}')
-    print()
+    # JSON comparisons are intended for scripting so only the differences are printed
+    json_output = args.command == 'compare' and args.format == 'json'
+
+    if not json_output:
+        print()
+        print(f'{BOLD}Launchpad Builder{ENDC}')
+        print()
 
     # Build
     if args.command == 'build':
         with open(args.config_path) as f:
-            config = yaml.load(f)
-
-        build_launchpad(config)
+            config = yaml.safe_load(f)
+
+        try:
+            build_launchpad(
+                config, deterministic_uuids=args.deterministic_uuids,
+                incremental=args.incremental
+            )
+        except TimeoutError as e:
+            print(f'{RED}{e}{ENDC}')
+            print()
+            exit(1)
         print(
             f'{GREEN}Successfully build the Launchpad layout defined in {args.config_path}{ENDC}'
         )
@@ -605,14 +1103,51 @@ def main():
     # Compare
     elif args.command == 'compare':
         with open(args.config_path) as f:
-            config = yaml.load(f)
+            config = yaml.safe_load(f)
+
+        if json_output:
+            conn = sqlite3.connect(os.path.join(get_launchpad_db_dir(), 'db'))
+            layout = extract_layout(conn)
+            conn.close()
+        else:
+            layout = extract_launchpad()
+
+        differences = {
+            layout_name: compare_layouts(config[layout_name], layout[layout_name])
+            for layout_name in ['app_layout', 'widget_layout']
+        }
+
+        if json_output:
+            print(json.dumps(differences, indent=2))
+        else:
+            for layout_name, title in [('app_layout', 'Apps'), ('widget_layout', 'Widgets')]:
+                if not differences[layout_name]:
+                    print(f'{GREEN}{title}: the layout matches the config{ENDC}')
+                    continue
 
-        layout = extract_launchpad()
+                print(f'{RED}{title}: {len(differences[layout_name])} differences found{ENDC}')
+                for difference in differences[layout_name]:
+                    description = difference['kind']
+                    if difference['title'] is not None:
+                        description += f' {difference["title"]}'
+                    if difference['type'] == 'missing':
+                        location = f'expected at {format_location(difference["expected"])}'
+                    elif difference['type'] == 'extra':
+                        location = f'found at {format_location(difference["actual"])}'
+                    else:
+                        location = (
+                            f'expected at {format_location(difference["expected"])} but '
+                            f'found at {format_location(difference["actual"])}'
+                        )
+                    print(f'{YELLOW}- {difference["type"]}{ENDC} {description} {location}')
 
-        if config != layout:
+        if any(differences.values()):
+            if not json_output:
+                print()
             exit(1)
 
-    print()
+    if not json_output:
+        print()
 
 
 if __name__ == '__main__':
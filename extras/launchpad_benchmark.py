@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+import io
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+from time import perf_counter
+
+import launchpad
+from launchpad import Types
+
+
+# Colours
+BOLD = '\033[1m'
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+ENDC = '\033[0m'
+
+# A schema resembling the Launchpad database created by the Dock
+LAUNCHPAD_SCHEMA = '''
+    CREATE TABLE dbinfo (
+        key VARCHAR,
+        value VARCHAR
+    );
+    CREATE TABLE items (
+        rowid INTEGER PRIMARY KEY ASC,
+        uuid VARCHAR,
+        flags INTEGER,
+        type INTEGER,
+        parent_id INTEGER NOT NULL,
+        ordering INTEGER
+    );
+    CREATE TABLE apps (
+        item_id INTEGER PRIMARY KEY,
+        title VARCHAR,
+        bundleid VARCHAR,
+        storeid VARCHAR,
+        category_id INTEGER,
+        moddate REAL,
+        bookmark BLOB
+    );
+    CREATE TABLE widgets (
+        item_id INTEGER PRIMARY KEY,
+        title VARCHAR,
+        bundleid VARCHAR,
+        storeid VARCHAR,
+        category_id INTEGER,
+        moddate REAL,
+        bookmark BLOB
+    );
+    CREATE TABLE groups (
+        item_id INTEGER PRIMARY KEY,
+        category_id INTEGER,
+        title VARCHAR
+    );
+    CREATE INDEX items_parent_id ON items (parent_id);
+    CREATE INDEX items_parent_ordering ON items (parent_id, ordering);
+    CREATE TRIGGER item_deleted AFTER DELETE ON items
+    BEGIN
+        DELETE FROM apps WHERE item_id = old.rowid;
+        DELETE FROM widgets WHERE item_id = old.rowid;
+        DELETE FROM groups WHERE item_id = old.rowid;
+    END;
+'''
+
+# Stand-ins for the macOS commands used by launchpad.py
+GETCONF_STUB = '''#!/bin/sh
+echo "{darwin_user_dir}"
+'''
+KILLALL_STUB = '''#!/bin/sh
+exit 0
+'''
+
+
+def create_launchpad_db(launchpad_db_path, num_apps, num_widgets=10):
+    """
+    Creates a synthetic Launchpad database containing the requested number of apps and widgets
+    which are all placed on the holding pages (as they are in a freshly built database).
+
+    :param launchpad_db_path: The path of the database to create.
+    :param num_apps: The number of apps to create.
+    :param num_widgets: The number of widgets to create.
+    """
+    conn = sqlite3.connect(launchpad_db_path)
+
+    with conn:
+        conn.executescript(LAUNCHPAD_SCHEMA)
+
+        conn.executemany('''
+            INSERT INTO dbinfo
+            (key, value)
+            VALUES
+            (?, ?)
+        ''', [
+            ('ignore_items_update_triggers', '0'),
+            ('launchpad_root', '1'),
+            ('dashboard_root', '3'),
+        ])
+
+        # Add root and holding pages
+        roots = [
+            (1, 'ROOTPAGE', Types.ROOT, 0),
+            (2, 'HOLDINGPAGE', Types.PAGE, 1),
+            (3, 'ROOTPAGE_DB', Types.ROOT, 0),
+            (4, 'HOLDINGPAGE_DB', Types.PAGE, 3),
+            (5, 'ROOTPAGE_VERS', Types.ROOT, 0),
+            (6, 'HOLDINGPAGE_VERS', Types.PAGE, 5)
+        ]
+        conn.executemany('''
+            INSERT INTO items
+            (rowid, uuid, flags, type, parent_id, ordering)
+            VALUES
+            (?, ?, null, ?, ?, 0)
+        ''', roots)
+        conn.executemany('''
+            INSERT INTO groups
+            (item_id, category_id, title)
+            VALUES
+            (?, null, null)
+        ''', [(rowid,) for rowid, _, _, _ in roots])
+
+        # Add widgets and apps to the holding pages
+        items = []
+        for index in range(num_widgets):
+            items.append((len(roots) + len(items) + 1, Types.WIDGET, 4, index, f'Widget {index}'))
+        for index in range(num_apps):
+            items.append((len(roots) + len(items) + 1, Types.APP, 2, index, f'App {index}'))
+
+        conn.executemany('''
+            INSERT INTO items
+            (rowid, uuid, flags, type, parent_id, ordering)
+            VALUES
+            (?, ?, 0, ?, ?, ?)
+        ''', [
+            (rowid, launchpad.generate_uuid(f'item/{title}'), type_, parent_id, ordering)
+            for rowid, type_, parent_id, ordering, title in items
+        ])
+        for table, type_ in [('widgets', Types.WIDGET), ('apps', Types.APP)]:
+            conn.executemany(f'''
+                INSERT INTO {table}
+                (item_id, title, bundleid)
+                VALUES
+                (?, ?, ?)
+            ''', [
+                (rowid, title, f'com.example.{title.lower().replace(" ", "")}')
+                for rowid, item_type, _, _, title in items if item_type == type_
+            ])
+
+    conn.close()
+
+
+def create_layout(titles, page_size=30, folder_size=12, folder_every=4):
+    """
+    Creates a layout containing the titles provided whereby some items on each page are
+    grouped into folders.
+
+    :param titles: The titles of the items to layout.
+    :param page_size: The number of items on each page.
+    :param folder_size: The number of items in each folder.
+    :param folder_every: How often (in terms of items on a page) a folder is created.
+
+    :return: The layout that was created.
+    """
+    layout = []
+    titles = list(titles)
+
+    while titles:
+        page = []
+        while titles and len(page) < page_size:
+            if len(page) % folder_every == folder_every - 1:
+                folder_items, titles = titles[:folder_size], titles[folder_size:]
+                page.append({
+                    'folder_title': f'Folder {len(layout) + 1}.{len(page) + 1}',
+                    'folder_layout': [folder_items]
+                })
+            else:
+                page.append(titles.pop(0))
+        layout.append(page)
+
+    return layout
+
+
+def time_call(function, *args, **kwargs):
+    """Calls the function provided, suppressing its output and returning the time taken."""
+    start = perf_counter()
+    with redirect_stdout(io.StringIO()):
+        function(*args, **kwargs)
+    return perf_counter() - start
+
+
+def benchmark(num_apps, num_widgets):
+    """
+    Times building, incrementally applying, extracting and comparing a Launchpad layout.
+
+    :param num_apps: The number of apps in the synthetic database.
+    :param num_widgets: The number of widgets in the synthetic database.
+
+    :return: A dict containing the time taken in seconds for each operation.
+    """
+    launchpad_db_dir = launchpad.get_launchpad_db_dir()
+    os.makedirs(launchpad_db_dir, exist_ok=True)
+    launchpad_db_path = os.path.join(launchpad_db_dir, 'db')
+    for launchpad_db_file in ['db', 'db-shm', 'db-wal']:
+        try:
+            os.remove(os.path.join(launchpad_db_dir, launchpad_db_file))
+        except OSError:
+            pass
+
+    create_launchpad_db(launchpad_db_path, num_apps, num_widgets)
+
+    config = {
+        'app_layout': create_layout(f'App {index}' for index in range(num_apps)),
+        'widget_layout': create_layout(f'Widget {index}' for index in range(num_widgets)),
+    }
+
+    def build_config(**kwargs):
+        launchpad.build_launchpad(
+            json.loads(json.dumps(config)), rebuild_db=False, **kwargs
+        )
+
+    def compare_config():
+        layout = launchpad.extract_launchpad()
+        for layout_name in ['app_layout', 'widget_layout']:
+            if launchpad.compare_layouts(config[layout_name], layout[layout_name]):
+                raise RuntimeError('the extracted layout does not match the config')
+
+    return {
+        'build': time_call(build_config),
+        'build_incremental': time_call(build_config, incremental=True),
+        'extract': time_call(launchpad.extract_launchpad),
+        'compare': time_call(compare_config),
+    }
+
+
+def main():
+    # Create the argument parser
+    parser = argparse.ArgumentParser(
+        description='benchmark launchpad.py against synthetic Launchpad databases'
+    )
+    parser.add_argument(
+        '-s', '--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+        help='the number of apps in each synthetic database'
+    )
+    parser.add_argument(
+        '-w', '--widgets', type=int, default=10,
+        help='the number of widgets in each synthetic database'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='a JSON lines file which results are appended to so they can be tracked over time'
+    )
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    print()
+    print(f'{BOLD}Launchpad Benchmark{ENDC}')
+    print()
+
+    with tempfile.TemporaryDirectory(prefix='launchpad.') as work_dir:
+        # Place stand-ins for getconf and killall at the front of the path
+        bin_dir = os.path.join(work_dir, 'bin')
+        os.makedirs(bin_dir)
+        for command, stub in [
+            ('getconf', GETCONF_STUB.format(darwin_user_dir=work_dir)),
+            ('killall', KILLALL_STUB)
+        ]:
+            stub_path = os.path.join(bin_dir, command)
+            with open(stub_path, 'w') as f:
+                f.write(stub)
+            os.chmod(stub_path, 0o755)
+        os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+
+        results = []
+        print(f'{"apps":>8} {"build":>10} {"incremental":>12} {"extract":>10} {"compare":>10}')
+        for size in args.sizes:
+            timings = benchmark(size, args.widgets)
+            print(
+                f'{size:>8} {timings["build"]:>9.3f}s {timings["build_incremental"]:>11.3f}s '
+                f'{timings["extract"]:>9.3f}s {timings["compare"]:>9.3f}s'
+            )
+            results.append({'apps': size, 'widgets': args.widgets, **timings})
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results
+            }) + '\n')
+        print()
+        print(f'{GREEN}Results appended to {args.output}{ENDC}')
+
+    print()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import plistlib
+import re
+import sys
+from xml.parsers.expat import ExpatError
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'library'))
+from plist import (  # noqa: E402
+    DEFAULT_CACHE_DIR, apply_changes, diff_values, format_path, format_value, read_plist,
+    resolve_path
+)
+
+# Use the C-accelerated YAML loader when available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+# Colours
+BOLD = '\033[1m'
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+ENDC = '\033[0m'
+
+# Exit codes (compatible with monitoring probes)
+OK = 0
+DRIFT = 1
+ERROR = 2
+
+# The host variables containing plist defaults
+DEFAULTS_VARIABLES = ['macos_os_defaults', 'software_app_defaults']
+
+# A simple variable reference in a Jinja2 template
+VARIABLE_RE = re.compile(r'{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}')
+
+
+def load_host_vars(host_vars_dir):
+    """
+    Loads and merges all YAML files in the host vars directory provided.
+
+    :param host_vars_dir: The host vars directory of the host.
+
+    :return: A dict containing all host variables.
+    """
+    host_vars = {}
+
+    for root, dirs, files in os.walk(host_vars_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if os.path.splitext(filename)[1] not in ['.yaml', '.yml']:
+                continue
+
+            with open(os.path.join(root, filename)) as f:
+                host_vars.update(yaml.load(f, Loader=SafeLoader) or {})
+
+    return host_vars
+
+
+def render(value, host_vars):
+    """
+    Substitutes simple variable references (e.g. {{ development_dir }}) in the value provided.
+    Any other templating is left untouched.
+    """
+    if isinstance(value, str):
+        def substitute(match):
+            variable = host_vars.get(match.group(1))
+            if isinstance(variable, str):
+                return render(variable, host_vars)
+            return match.group(0)
+
+        return VARIABLE_RE.sub(substitute, value)
+    elif isinstance(value, dict):
+        return {key: render(item, host_vars) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [render(item, host_vars) for item in value]
+    else:
+        return value
+
+
+def check_plist(plist_file, entries, cache_dir):
+    """
+    Compares the defaults for a plist file against the live plist.
+
+    :param plist_file: The path of the plist file.
+    :param entries: A list of defaults entries which resolve to the plist file.
+    :param cache_dir: The plist cache directory.
+
+    :return: A list containing the changes required for each entry.
+    """
+    plist, _ = read_plist(plist_file, cache_dir)
+
+    # Changes are applied in memory so that later entries are compared against the result of
+    # earlier ones (as the plist module does)
+    drift = []
+    for entry in entries:
+        changes = diff_values(plist, entry['values'])
+        apply_changes(plist, changes)
+        drift.append(changes)
+
+    return drift
+
+
+def main():
+    # Create the argument parser
+    parser = argparse.ArgumentParser(
+        description='report plist defaults which have drifted from the host vars'
+    )
+    parser.add_argument(
+        '-H', '--host-vars-dir',
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), os.pardir, 'host_vars', 'localhost'
+        ),
+        help='the host vars directory containing the defaults'
+    )
+    parser.add_argument(
+        '-v', '--variable', action='append', dest='variables',
+        help=f'the host variable containing defaults (default: {", ".join(DEFAULTS_VARIABLES)})'
+    )
+    parser.add_argument(
+        '-f', '--format', choices=['json', 'text'], default='text',
+        help='the format of the drift report'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count(),
+        help='the number of plist files to load in parallel'
+    )
+    parser.add_argument(
+        '-q', '--quiet', action='store_true', help='only report drift using the exit code'
+    )
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    cache_dir = os.path.expanduser(DEFAULT_CACHE_DIR)
+    host_vars = load_host_vars(args.host_vars_dir)
+
+    # Group the defaults by the plist file they resolve to
+    grouped = {}
+    for variable in args.variables or DEFAULTS_VARIABLES:
+        for entry in host_vars.get(variable, []):
+            entry = render(entry, host_vars)
+            plist_file = resolve_path(entry['domain'], entry.get('container'), cache_dir)
+            grouped.setdefault(plist_file, []).append(entry)
+
+    # Load and compare the plist files in parallel
+    report = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            plist_file: executor.submit(check_plist, plist_file, entries, cache_dir)
+            for plist_file, entries in grouped.items()
+        }
+
+        for plist_file, future in futures.items():
+            try:
+                drift = future.result()
+            except (plistlib.InvalidFileException, ExpatError):
+                errors.append((plist_file, 'Unable to parse the plist file'))
+                continue
+            except (ValueError, TypeError) as e:
+                # Invalid defaults (e.g. a bad merge specification)
+                errors.append((plist_file, f'Invalid values for the plist file: {e}'))
+                continue
+
+            for entry, changes in zip(grouped[plist_file], drift):
+                if changes:
+                    report.append((entry['domain'], plist_file, changes))
+
+    if not args.quiet:
+        if args.format == 'json':
+            print(json.dumps({
+                'drift': [
+                    {
+                        'domain': domain,
+                        'path': plist_file,
+                        'changes': [
+                            {
+                                'action': action,
+                                'key': list(path),
+                                'actual': None if action == 'added' else format_value(before),
+                                'expected': None if action == 'removed' else format_value(after),
+                            }
+                            for action, path, before, after in changes
+                        ]
+                    }
+                    for domain, plist_file, changes in report
+                ],
+                'errors': [
+                    {'path': plist_file, 'error': message} for plist_file, message in errors
+                ]
+            }, indent=2))
+        else:
+            for plist_file, message in errors:
+                print(f'{RED}Error: {message} ({plist_file}){ENDC}')
+
+            for domain, plist_file, changes in report:
+                print(f'{YELLOW}{domain}{ENDC} ({plist_file})')
+                for action, path, before, after in changes:
+                    if action == 'added':
+                        print(
+                            f'  {RED}missing{ENDC} {format_path(path)}: '
+                            f'expected {format_value(after)}'
+                        )
+                    elif action == 'removed':
+                        print(f'  {RED}present{ENDC} {format_path(path)}: {format_value(before)}')
+                    else:
+                        print(
+                            f'  {RED}{action}{ENDC} {format_path(path)}: '
+                            f'{format_value(before)} (expected {format_value(after)})'
+                        )
+
+            if not report and not errors:
+                print(f'{GREEN}No drift found in {len(grouped)} plist files{ENDC}')
+
+    if errors:
+        exit(ERROR)
+    elif report:
+        exit(DRIFT)
+    else:
+        exit(OK)
+
+
+if __name__ == '__main__':
+    main()
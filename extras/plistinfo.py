@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
+import argparse
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
 import os
-from glob import glob
 import plistlib
 import sys
+from xml.parsers.expat import ExpatError
+
 import yaml
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'library'))
+from plist import DEFAULT_CACHE_DIR, resolve_path  # noqa: E402
+
+
+# Use the C-accelerated YAML dumper when available
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
 
 # Colours
 BOLD = '\033[1m'
@@ -16,41 +32,205 @@ ENDC = '\033[0m'
 
 
 def determine_plist_path(destination):
-    # Check for global preferences
-    if destination in ['NSGlobalDomain', 'Apple Global Domain']:
-        return os.path.expanduser('~/Library/Preferences/.GlobalPreferences.plist')
-
-    # Check for regular user preferences
-    user_plist_file = os.path.expanduser(f'~/Library/Preferences/{destination}.plist')
-    if os.path.isfile(user_plist_file):
-        return user_plist_file
-
-    # Check for preferences relating to sandboxed apps
-    sandboxed_plist_file = glob(
-        os.path.expanduser(f'~/Library/Containers/*/Data/Library/Preferences/{destination}.plist')
-    )
-    if sandboxed_plist_file:
-        return sandboxed_plist_file[0]
+    # Resolve global, regular and sandboxed app preferences using the plist module's domain
+    # index (which is persisted and shared with the plist module)
+    plist_file = resolve_path(destination, cache_dir=os.path.expanduser(DEFAULT_CACHE_DIR))
+    if os.path.isfile(plist_file):
+        return plist_file
 
     # If all else fails, assume that the destination is a path reference
     return os.path.expanduser(destination)
 
 
+def determine_container(plist_file):
+    """Determines the container of a sandboxed app from the path of its plist file."""
+    containers_dir = os.path.expanduser('~/Library/Containers') + os.sep
+    if plist_file.startswith(containers_dir):
+        return plist_file[len(containers_dir):].split(os.sep, 1)[0]
+    return None
+
+
+def export_plist(destination):
+    """
+    Loads the requested plist and builds an app defaults entry for it.
+
+    :param destination: The domain or path of the plist file.
+
+    :return: A tuple containing the path of the plist file and the app defaults entry.
+    """
+    plist_file = determine_plist_path(destination)
+    with open(plist_file, 'rb') as f:
+        plist_data = plistlib.load(f)
+
+    entry = {'domain': destination}
+    container = determine_container(plist_file)
+    if container:
+        entry['container'] = container
+    entry['values'] = plist_data
+
+    return plist_file, entry
+
+
+def find_domains(directory):
+    """
+    Obtains the domains of all plist files present in a directory.  The path of a plist file is
+    used instead of its domain if the domain would not resolve to the same file.
+    """
+    destinations = []
+
+    for filename in sorted(os.listdir(directory)):
+        plist_file = os.path.join(directory, filename)
+        if not filename.endswith('.plist') or not os.path.isfile(plist_file):
+            continue
+
+        domain = filename[:-len('.plist')]
+        if os.path.realpath(determine_plist_path(domain)) == os.path.realpath(plist_file):
+            destinations.append(domain)
+        else:
+            destinations.append(plist_file)
+
+    return destinations
+
+
+def json_default(value):
+    """Converts plist data types which are not supported by JSON."""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    elif isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dump(data, format):
+    """Dumps the data provided in the requested format."""
+    if format == 'json':
+        return json.dumps(data, indent=2, default=json_default) + '\n'
+    else:
+        return yaml.dump(
+            data, Dumper=SafeDumper, default_flow_style=False, explicit_start=True,
+            sort_keys=False
+        )
+
+
+def bulk_export(destinations, output, format, split, jobs):
+    """
+    Exports many plist files in the app defaults format using a pool of threads.
+
+    :param destinations: The domains or paths of the plist files to export.
+    :param output: The file (or directory if splitting) to write to, or None for stdout.
+    :param format: The format to export to (json or yaml).
+    :param split: Whether or not to write a file for each domain to the output directory.
+    :param jobs: The number of threads to use for loading and dumping the plist files.
+
+    :return: True if all plist files were exported successfully.
+    """
+    success = True
+    entries = []
+
+    def export(destination):
+        plist_file, entry = export_plist(destination)
+        if split:
+            filename = os.path.basename(destination)
+            if filename.endswith('.plist'):
+                filename = filename[:-len('.plist')]
+            with open(os.path.join(output, f'{filename}.{format}'), 'w') as f:
+                f.write(dump({'software_app_defaults': [entry]}, format))
+        return entry
+
+    if split:
+        os.makedirs(output, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(export, destination) for destination in destinations]
+
+        for destination, future in zip(destinations, futures):
+            try:
+                entries.append(future.result())
+            except IOError:
+                print(
+                    f'{RED}Error: The requested plist file {destination} was not found{ENDC}',
+                    file=sys.stderr
+                )
+                success = False
+            except (plistlib.InvalidFileException, ExpatError):
+                print(
+                    f'{RED}Error: Unable to parse the requested plist file {destination}{ENDC}',
+                    file=sys.stderr
+                )
+                success = False
+
+    if not split:
+        document = dump({'software_app_defaults': entries}, format)
+        if output:
+            with open(output, 'w') as f:
+                f.write(document)
+        else:
+            print(document, end='')
+
+    return success
+
+
 def main():
+    # Create the argument parser
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'destinations', nargs='*',
+        help='the domains or paths of the plist files (a plist is read from stdin if omitted)'
+    )
+    parser.add_argument(
+        '-d', '--directory', action='append', default=[],
+        help='export all plist files in the directory provided (may be used multiple times)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='the file to export to, or the directory to export to when splitting'
+    )
+    parser.add_argument(
+        '-s', '--split', action='store_true',
+        help='write a file for each domain into the output directory'
+    )
+    parser.add_argument(
+        '-f', '--format', choices=['json', 'yaml'], default='yaml',
+        help='the format to export to'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count(),
+        help='the number of plist files to process in parallel'
+    )
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    if args.split and not args.output:
+        parser.error('please specify an output directory when splitting')
+
     try:
+        destinations = list(args.destinations)
+        for directory in args.directory:
+            destinations.extend(find_domains(os.path.expanduser(directory)))
+
+        # Bulk export
+        if len(destinations) > 1 or args.directory or args.output:
+            if not bulk_export(destinations, args.output, args.format, args.split, args.jobs):
+                exit(1)
+            return
+
         try:
-            plist_file = determine_plist_path(sys.argv[1])
+            plist_file = determine_plist_path(destinations[0])
             with open(plist_file, 'rb') as f:
                 plist_data = plistlib.load(f)
         except IndexError:
             plist_file = '<stdin>'
             plist_data = plistlib.loads(sys.stdin.buffer.read())
 
-        print(yaml.dump(plist_data, default_flow_style=False), end='')
+        if args.format == 'json':
+            print(json.dumps(plist_data, indent=2, sort_keys=True, default=json_default))
+        else:
+            print(yaml.dump(plist_data, Dumper=SafeDumper, default_flow_style=False), end='')
     except IOError:
         print(f'{RED}Error: The requested plist file {plist_file} was not found{ENDC}')
         exit(1)
-    except plistlib.InvalidFileException:
+    except (plistlib.InvalidFileException, ExpatError):
         print(f'{RED}Error: Unable to parse the requested plist file {plist_file}{ENDC}')
         exit(1)
     except KeyboardInterrupt:
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
 import glob
+import hashlib
+import json
 import os
 import plistlib
 import re
 import shlex
+import stat
 import subprocess
 import tempfile
+import threading
+from time import perf_counter
+from xml.parsers.expat import ExpatError
+import zipfile
 
 import yaml
 
@@ -21,6 +32,41 @@ ENDC = '\033[0m'
 # Open /dev/null
 DEVNULL = open(os.devnull, 'w')
 
+# macOS only allows one installer to run at a time, so every installer call holds this lock
+INSTALLER_LOCK = threading.Lock()
+
+# The number of archives extracted in parallel and how many of those may read from the same
+# device at once (to avoid thrashing spinning backup drives)
+EXTRACT_JOBS = os.cpu_count()
+EXTRACT_JOBS_PER_DEVICE = 2
+
+# Multipart RAR archives (e.g. Library.part01.rar)
+MULTIPART_RE = re.compile(r'\.part([0-9]+)\.rar$')
+
+# The number of directories scanned in parallel when normalising permissions
+PERMISSION_JOBS = 8
+
+# The number of Komplete ISO images mounted in the background while another is installed
+KOMPLETE_PREFETCH = 1
+
+# The file types indexed when scanning the sample library source
+INDEXED_EXTENSIONS = ['.pkg', '.iso', '.zip', '.rar']
+ARCHIVE_EXTENSIONS = ['.zip', '.rar']
+
+# The config file which may be placed in a library directory to override library variables
+LIBRARY_CONFIG_FILENAME = '.library.yaml'
+
+# The manifest recording extracted archives and the cache of Komplete installer choices
+# (both stored in the destination base directory)
+MANIFEST_FILENAME = '.samples-manifest.json'
+CHOICES_CACHE_FILENAME = '.samples-choices.json'
+
+# The JSON lines log of timing events (stored in the destination base directory)
+EVENT_LOG_FILENAME = '.samples-events.jsonl'
+
+# The size of the chunks read from the start and end of each archive to build its content hash
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 def run(command, **kwargs):
     if not kwargs.get('shell', False):
@@ -32,7 +78,251 @@ def sudo(command, **kwargs):
     return run(f'sudo {command}', **kwargs)
 
 
-def logic_pro_x_content(sample_libraries_source, destination_basedir):
+def load_state(state_path):
+    """Loads a JSON state file (e.g. a manifest or cache), returning an empty dict if missing."""
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state_path, state):
+    """Atomically saves a JSON state file so an interruption can't leave it truncated."""
+    state_fd, state_temp_path = tempfile.mkstemp(
+        prefix=f'{os.path.basename(state_path)}.', dir=os.path.dirname(state_path)
+    )
+    with os.fdopen(state_fd, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(state_temp_path, state_path)
+
+
+def format_size(size):
+    """Formats a number of bytes in human-readable form."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+def free_space(path):
+    """Determines the free space of the file system containing the path provided."""
+    path_statvfs = os.statvfs(path)
+    return path_statvfs.f_bavail * path_statvfs.f_frsize
+
+
+class EventLog:
+    """
+    Records the wall time, bytes read and written and throughput of each stage, library,
+    archive and installer step to a JSON lines file and summarises them at the end of the run.
+    Events may be recorded from any thread.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: The JSON lines file which events are appended to (events are only kept in
+                     memory when this is None).
+        """
+        self.path = path
+        self.run = datetime.now().isoformat()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, kind, name, seconds, bytes_read=0, bytes_written=None, **fields):
+        """
+        Records an event.
+
+        :param kind: The kind of event (e.g. stage, library or archive).
+        :param name: The name of the stage, library, archive or package.
+        :param seconds: The wall time taken.
+        :param bytes_read: The number of bytes read from the source.
+        :param bytes_written: The number of bytes written (or None when unknown).
+        :param fields: Any additional fields to record with the event.
+        """
+        event = {
+            'run': self.run,
+            'timestamp': datetime.now().isoformat(),
+            'kind': kind,
+            'name': name,
+            'seconds': round(seconds, 3),
+            'bytes_read': bytes_read,
+            'bytes_written': bytes_written,
+            'read_throughput': round(bytes_read / seconds) if seconds else None,
+            'write_throughput': (
+                round(bytes_written / seconds) if seconds and bytes_written is not None else None
+            ),
+            **fields
+        }
+
+        with self.lock:
+            self.events.append(event)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(event) + '\n')
+
+    @contextmanager
+    def measure(self, kind, name, path=None, aggregate=False, **fields):
+        """
+        Measures the wall time of the enclosed block and records it as an event.  The block may
+        set bytes_read and bytes_written in the dict it is given.  When a path is provided and
+        bytes_written isn't set, the drop in free space of its file system is used instead
+        (which is only accurate while nothing else writes to the file system).
+
+        :param kind: The kind of event.
+        :param name: The name of the event.
+        :param path: A path on the file system being written to.
+        :param aggregate: Whether bytes_read should default to the total of the events recorded
+                          within the block (e.g. for a stage).
+        :param fields: Any additional fields to record with the event.
+        """
+        metrics = {'bytes_read': 0, 'bytes_written': None, 'result': 'complete'}
+        free_space_before = free_space(path) if path and os.path.isdir(path) else None
+        first_event = len(self.events)
+        start = perf_counter()
+
+        try:
+            yield metrics
+        except BaseException:
+            metrics['result'] = 'aborted'
+            raise
+        finally:
+            seconds = perf_counter() - start
+            if aggregate and not metrics['bytes_read']:
+                # Library events are excluded as they total the archives already included
+                with self.lock:
+                    metrics['bytes_read'] = sum(
+                        event['bytes_read'] for event in self.events[first_event:]
+                        if event['kind'] != 'library'
+                    )
+            if metrics['bytes_written'] is None and free_space_before is not None:
+                metrics['bytes_written'] = max(free_space_before - free_space(path), 0)
+            self.record(kind, name, seconds, **metrics, **fields)
+
+    def summary(self):
+        """Prints a table summarising each stage followed by totals for other event kinds."""
+        rows = []
+        totals = {}
+
+        with self.lock:
+            for event in self.events:
+                if event['kind'] == 'stage':
+                    rows.append((event['name'], 1, event))
+                else:
+                    total = totals.setdefault(
+                        event['kind'], {'seconds': 0, 'bytes_read': 0, 'bytes_written': None}
+                    )
+                    total['count'] = total.get('count', 0) + 1
+                    total['seconds'] += event['seconds']
+                    total['bytes_read'] += event['bytes_read']
+                    if event['bytes_written'] is not None:
+                        total['bytes_written'] = (
+                            (total['bytes_written'] or 0) + event['bytes_written']
+                        )
+
+        rows.extend((f'{kind} (total)', total['count'], total) for kind, total in totals.items())
+        if not rows:
+            return
+
+        print(f'{BOLD}Timing Summary{ENDC}')
+        print()
+        print(
+            f'{"":<36} {"count":>6} {"time":>10} {"read":>10} {"written":>10} '
+            f'{"read/s":>10} {"write/s":>10}'
+        )
+        for name, count, event in rows:
+            seconds = event['seconds']
+            bytes_read = event['bytes_read']
+            bytes_written = event['bytes_written']
+            read_rate = format_size(bytes_read / seconds) if seconds and bytes_read else '-'
+            write_rate = format_size(bytes_written / seconds) if seconds and bytes_written else '-'
+            print(
+                f'{name:<36.36} {count:>6} {seconds:>9.1f}s '
+                f'{format_size(bytes_read) if bytes_read else "-":>10} '
+                f'{format_size(bytes_written) if bytes_written else "-":>10} '
+                f'{read_rate:>10} {write_rate:>10}'
+            )
+        print()
+        print(
+            'Totals for libraries, archives and installer steps are cumulative and may exceed '
+            'the stage time when run in parallel'
+        )
+        if self.path:
+            print(f'Events were logged to {self.path}')
+
+
+def scan_source(source):
+    """
+    Walks the source directory once, indexing the installer packages, ISO images, archives and
+    library configs used by each stage of the install.
+
+    :param source: The sample library source directory.
+
+    :return: A dict containing a files dict mapping each indexed extension to a sorted list of
+             paths and a libraries dict mapping each library directory (two levels below the
+             source) to a dict containing its archives and config file path (or None).
+    """
+    index = {
+        'files': {extension: [] for extension in INDEXED_EXTENSIONS},
+        'libraries': {}
+    }
+
+    # Each directory is tracked with its depth and the library directory containing it
+    directories = [(source, 0, None)]
+
+    while directories:
+        directory, depth, library_path = directories.pop()
+
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = entry.is_file(follow_symlinks=False)
+            except OSError:
+                continue
+
+            if is_dir:
+                if depth == 1:
+                    index['libraries'][entry.path] = {'archives': [], 'config': None}
+                    directories.append((entry.path, depth + 1, entry.path))
+                else:
+                    directories.append((entry.path, depth + 1, library_path))
+
+            elif is_file:
+                if entry.name == LIBRARY_CONFIG_FILENAME and depth == 2:
+                    index['libraries'][library_path]['config'] = entry.path
+                    continue
+
+                extension = os.path.splitext(entry.name)[1]
+                if extension not in INDEXED_EXTENSIONS:
+                    continue
+
+                index['files'][extension].append(entry.path)
+                if extension in ARCHIVE_EXTENSIONS and library_path:
+                    index['libraries'][library_path]['archives'].append(entry.path)
+
+    for paths in index['files'].values():
+        paths.sort()
+    for library in index['libraries'].values():
+        library['archives'].sort()
+
+    return index
+
+
+def indexed_files(index, extension, directory):
+    """Obtains the indexed files with the extension provided that are within a directory."""
+    prefix = os.path.join(directory, '')
+    return [path for path in index['files'][extension] if path.startswith(prefix)]
+
+
+def logic_pro_x_content(
+    sample_libraries_source, destination_basedir, index=None, event_log=None
+):
     print()
     print(f'{BOLD}Logic Pro X Content{ENDC}')
 
@@ -72,18 +362,159 @@ def logic_pro_x_content(sample_libraries_source, destination_basedir):
         print(f'- {src} -> {dest}')
         sudo(f'ln -s "{src}" "{dest}"')
 
-    packages_proc = run(f'find "{source}" -type f -name "*.pkg"', stdout=subprocess.PIPE)
+    if index is None:
+        index = scan_source(sample_libraries_source)
+    if event_log is None:
+        event_log = EventLog()
 
-    for package in packages_proc.stdout.strip().split('\n'):
+    for package in indexed_files(index, '.pkg', source):
         print()
         print(f'{BLUE}Running installer {os.path.basename(package)}{ENDC}')
-        sudo(f'installer -package "{package}" -target /')
+        with event_log.measure(
+            'package', os.path.basename(package), path=destination
+        ) as metrics:
+            metrics['bytes_read'] = os.path.getsize(package)
+            with INSTALLER_LOCK:
+                sudo(f'installer -package "{package}" -target /')
 
     print()
     print(f'{GREEN}Installation of the Logic Pro X content complete{ENDC}')
 
 
-def komplete_libraries(sample_libraries_source, destination_basedir):
+def read_plist_output(lines):
+    """
+    Reads the first XML plist from the output of a command, ignoring anything before or after
+    it (the installer command sometimes prints extra lines before the plist).
+
+    :param lines: An iterable of output lines (e.g. the stdout of a running process).
+
+    :return: The parsed plist or None if no valid plist was found.
+    """
+    plist_lines = None
+
+    for line in lines:
+        if plist_lines is None:
+            start = line.find('<?xml')
+            if start == -1:
+                continue
+            plist_lines = []
+            line = line[start:]
+
+        end = line.find('</plist>')
+        if end != -1:
+            plist_lines.append(line[:end + len('</plist>')])
+            break
+
+        plist_lines.append(line)
+    else:
+        return None
+
+    try:
+        return plistlib.loads(''.join(plist_lines).encode('utf-8'))
+    except (ValueError, ExpatError):
+        return None
+
+
+def prepare_komplete_iso(
+    iso, empty_plist_name, hdiutil_command, installer_command, cached_choice_identifier=None
+):
+    """
+    Mounts a Komplete ISO image and determines its installer package along with the installer
+    choice used to set a custom install location.  This runs while the previous ISO is being
+    installed, so output is collected and returned rather than printed.
+
+    :param iso: The path of the ISO image.
+    :param empty_plist_name: The path of an empty plist used to query the installer choices.
+    :param hdiutil_command: The command used to run hdiutil.
+    :param installer_command: The command used to run installer.
+    :param cached_choice_identifier: The choice identifier of this ISO from a previous run which
+                                     avoids querying the installer choices.
+
+    :return: A dict containing the mountpoint, package and choice identifier (each being None
+             when they couldn't be determined) along with the output lines collected.
+    """
+    prepared = {'mountpoint': None, 'package': None, 'choice_identifier': None, 'output': []}
+    output = prepared['output']
+
+    output.append(f'{BLUE}Mounting ISO image {os.path.basename(iso)}{ENDC}')
+    mount_proc = run(f'{hdiutil_command} mount "{iso}"', stdout=subprocess.PIPE)
+    if mount_proc.returncode != 0:
+        output.append(f'{RED}Unable to mount the ISO image, skipping{ENDC}')
+        return prepared
+
+    mountpoint = prepared['mountpoint'] = mount_proc.stdout.strip().split('\t')[-1]
+    output.append(f'{BLUE}ISO mounted under {mountpoint}{ENDC}')
+
+    # The ISO stays mounted if anything below fails, so the mountpoint is always returned to
+    # allow the caller to unmount it
+    try:
+        packages = glob.glob(f'{mountpoint}/* Installer Mac.pkg')
+        if len(packages) != 1:
+            output.append(
+                f'{RED}Unable to determine the installer package for this library, skipping{ENDC}'
+            )
+            return prepared
+
+        package = prepared['package'] = packages[0]
+        output.append(f'{GREEN}Found installer package {package}{ENDC}')
+
+        if cached_choice_identifier:
+            prepared['choice_identifier'] = cached_choice_identifier
+            output.append(
+                f'{GREEN}Using cached install location choice identifier '
+                f'{cached_choice_identifier}{ENDC}'
+            )
+            return prepared
+
+        # Obtain all installer choices as a plist which is parsed as the output is read (waiting
+        # for any running installer to complete first and capturing errors so they aren't
+        # interleaved with its output)
+        with INSTALLER_LOCK, tempfile.TemporaryFile('w+') as choices_stderr:
+            with subprocess.Popen(
+                shlex.split(
+                    f'{installer_command} -showChoicesAfterApplyingChangesXML '
+                    f'"{empty_plist_name}" -package "{package}" -target /'
+                ),
+                stdout=subprocess.PIPE, stderr=choices_stderr, encoding='utf-8', errors='replace'
+            ) as choices_proc:
+                choices = read_plist_output(choices_proc.stdout)
+
+                # Drain any remaining output so the installer isn't blocked writing to the pipe
+                for _ in choices_proc.stdout:
+                    pass
+
+            choices_stderr.seek(0)
+            output.extend(line.rstrip() for line in choices_stderr if line.strip())
+
+        # Determine the installer option that we can override to set a custom install location
+        for choice in choices if isinstance(choices, list) else []:
+            if (
+                choice.get('choiceAttribute') == 'customLocation' and
+                choice.get('attributeSetting') == '/Users/Shared'
+            ):
+                prepared['choice_identifier'] = choice['choiceIdentifier']
+
+        if prepared['choice_identifier']:
+            output.append(
+                f'{GREEN}Found install location choice identifier '
+                f'{prepared["choice_identifier"]}{ENDC}'
+            )
+        else:
+            output.append(
+                f'{RED}Unable to identify install location choice identifier '
+                f'for this library, skipping{ENDC}'
+            )
+    except Exception as e:
+        prepared['choice_identifier'] = None
+        output.append(f'{RED}Unable to prepare the ISO image ({e}), skipping{ENDC}')
+
+    return prepared
+
+
+def komplete_libraries(
+    sample_libraries_source, destination_basedir, index=None, prefetch=KOMPLETE_PREFETCH,
+    hdiutil_command='hdiutil', installer_command='sudo installer', event_log=None
+):
     print()
     print(f'{BOLD}Komplete Libraries{ENDC}')
 
@@ -100,86 +531,116 @@ def komplete_libraries(sample_libraries_source, destination_basedir):
 
     run(f'mkdir -p "{destination}"')
 
-    isos_proc = run(f'find "{source}" -type f -name "*.iso"', stdout=subprocess.PIPE)
+    if index is None:
+        index = scan_source(sample_libraries_source)
+    if event_log is None:
+        event_log = EventLog()
+
+    # Installer choice identifiers found on previous runs are cached by the ISO's path
+    # (relative to the source), size and modification time
+    choices_cache_path = os.path.join(destination_basedir, CHOICES_CACHE_FILENAME)
+    choices_cache = load_state(choices_cache_path)
+
+    # Upcoming ISOs are mounted and their installer packages found in the background while the
+    # current ISO is installed (installer calls, including the choices query, are serialised by
+    # the installer lock so they only proceed once the running install completes)
+    isos = iter(indexed_files(index, '.iso', source))
+    futures = deque()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        def prepare(iso, cached_choice_identifier):
+            with event_log.measure(
+                'iso_prepare', os.path.basename(iso), cached=bool(cached_choice_identifier)
+            ):
+                return prepare_komplete_iso(
+                    iso, empty_plist_name, hdiutil_command, installer_command,
+                    cached_choice_identifier
+                )
 
-    for iso in isos_proc.stdout.strip().split('\n'):
-        print()
-        print(f'{BLUE}Mounting ISO image {os.path.basename(iso)}{ENDC}')
-        mount_proc = run(f'hdiutil mount "{iso}"', stdout=subprocess.PIPE)
-        mountpoint = mount_proc.stdout.strip().split('\t')[-1]
-        print(f'{BLUE}ISO mounted under {mountpoint}{ENDC}')
+        def prepare_ahead(count):
+            while len(futures) < count:
+                iso = next(isos, None)
+                if not iso:
+                    return
 
-        try:
-            packages = glob.glob(f'{mountpoint}/* Installer Mac.pkg')
-            if len(packages) != 1:
-                print(
-                    f'{RED}Unable to determine the installer package for this library, '
-                    f'skipping{ENDC}'
-                )
-                continue
+                cache_key = os.path.relpath(iso, sample_libraries_source)
+                iso_stat = os.stat(iso)
+                stats = [iso_stat.st_size, iso_stat.st_mtime_ns]
 
-            package = packages[0]
-            print(f'{GREEN}Found installer package {package}{ENDC}')
+                cached = choices_cache.get(cache_key)
+                cached_choice_identifier = None
+                if cached and cached['stats'] == stats:
+                    cached_choice_identifier = cached['choice_identifier']
 
-            # Obtain all installer choices as a plist
-            choices_proc = run(
-                f'sudo installer -showChoicesAfterApplyingChangesXML "{empty_plist_name}" '
-                f'-package "{package}" -target /', stdout=subprocess.PIPE
-            )
+                future = executor.submit(prepare, iso, cached_choice_identifier)
+                futures.append((future, cache_key, stats))
 
-            # Split the lines and crop output to only include the plist
-            # (sometimes the installer command includes extra lines before the plist)
-            choices_stdout_lines = choices_proc.stdout.strip().split('\n')
-            choices_plist_start_index = choices_stdout_lines.index(
-                '<?xml version="1.0" encoding="UTF-8"?>'
-            )
-            choices_plist_end_index = choices_stdout_lines.index('</plist>') + 1
-            choices_plist = '\n'.join(
-                choices_stdout_lines[choices_plist_start_index:choices_plist_end_index]
-            )
+        try:
+            while True:
+                # Prepare the next ISO (if it isn't already) and wait for it
+                prepare_ahead(1)
+                if not futures:
+                    break
 
-            # Determine the installer option that we can override to set a custom install location
-            choice_library_identifier = None
-            for choice in plistlib.loads(choices_plist.encode('utf-8')):
-                if (
-                    choice['choiceAttribute'] == 'customLocation' and
-                    choice['attributeSetting'] == '/Users/Shared'
-                ):
-                    choice_library_identifier = choice['choiceIdentifier']
+                future, cache_key, stats = futures.popleft()
+                prepared = future.result()
 
-            if not choice_library_identifier:
-                print(
-                    f'{RED}Unable to identify install location choice identifier '
-                    f'for this library, skipping{ENDC}'
-                )
-                continue
+                # Prepare up to the prefetch count of ISOs while this one is installed
+                prepare_ahead(prefetch)
 
-            print(
-                f'{GREEN}Found install location choice identifier '
-                f'{choice_library_identifier}{ENDC}'
-            )
+                cache_entry = {'stats': stats, 'choice_identifier': prepared['choice_identifier']}
+                if prepared['choice_identifier'] and choices_cache.get(cache_key) != cache_entry:
+                    choices_cache[cache_key] = cache_entry
+                    save_state(choices_cache_path, choices_cache)
 
-            # Build the plist file containing our custom install location
-            with open(location_plist_name, 'wb') as f:
-                plistlib.dump([
-                    {
-                        'choiceIdentifier': choice_library_identifier,
-                        'choiceAttribute': 'customLocation',
-                        'attributeSetting': destination
-                    }
-                ], f)
+                print()
+                for line in prepared['output']:
+                    print(line)
 
-            print()
-            print(f'{BLUE}Running installer {os.path.basename(package)}{ENDC}')
-            sudo(
-                f'installer -applyChoiceChangesXML "{location_plist_name}" '
-                f'-package "{package}" -target /'
-            )
+                try:
+                    if not prepared['choice_identifier']:
+                        continue
+
+                    # Build the plist file containing our custom install location
+                    with open(location_plist_name, 'wb') as f:
+                        plistlib.dump([
+                            {
+                                'choiceIdentifier': prepared['choice_identifier'],
+                                'choiceAttribute': 'customLocation',
+                                'attributeSetting': destination
+                            }
+                        ], f)
+
+                    print()
+                    print(f'{BLUE}Running installer {os.path.basename(prepared["package"])}{ENDC}')
+                    with event_log.measure(
+                        'iso_install', os.path.basename(cache_key), path=destination
+                    ) as metrics:
+                        metrics['bytes_read'] = stats[0]
+                        with INSTALLER_LOCK:
+                            run(
+                                f'{installer_command} -applyChoiceChangesXML '
+                                f'"{location_plist_name}" '
+                                f'-package "{prepared["package"]}" -target /'
+                            )
+
+                finally:
+                    if prepared['mountpoint']:
+                        print()
+                        print(f'{BLUE}Unmounting ISO image under {prepared["mountpoint"]}{ENDC}')
+                        run(f'{hdiutil_command} unmount "{prepared["mountpoint"]}"')
 
         finally:
-            print()
-            print(f'{BLUE}Unmounting ISO image under {mountpoint}{ENDC}')
-            mount_proc = run(f'hdiutil unmount "{mountpoint}"')
+            # Unmount any ISOs which were prepared but not installed (e.g. upon interruption)
+            for future, _, _ in futures:
+                if future.cancel():
+                    continue
+                try:
+                    mountpoint = future.result()['mountpoint']
+                except Exception:
+                    continue
+                if mountpoint:
+                    run(f'{hdiutil_command} unmount "{mountpoint}"')
 
     print(f'{BLUE}Hiding the Library directory on the sample drive{ENDC}')
     run(f'chflags hidden "{destination_basedir}/Library"')
@@ -188,7 +649,72 @@ def komplete_libraries(sample_libraries_source, destination_basedir):
     print(f'{GREEN}Installation of the Komplete libraries complete{ENDC}')
 
 
-def omnisphere_steam_library(music_software_source, destination_basedir):
+def normalize_directory_permissions(directory, dir_mode, file_mode):
+    """
+    Applies the modes provided to the directories and files directly within a directory,
+    only changing those which differ.  Symbolic links and special files are left untouched.
+
+    :return: A tuple containing the number of modes changed and a list of sub-directories.
+    """
+    changed = 0
+    subdirs = []
+
+    with os.scandir(directory) as it:
+        for entry in it:
+            entry_stat = entry.stat(follow_symlinks=False)
+
+            if stat.S_ISDIR(entry_stat.st_mode):
+                subdirs.append(entry.path)
+                mode = dir_mode
+            elif stat.S_ISREG(entry_stat.st_mode):
+                mode = file_mode
+            else:
+                continue
+
+            if stat.S_IMODE(entry_stat.st_mode) != mode:
+                os.chmod(entry.path, mode)
+                changed += 1
+
+    return changed, subdirs
+
+
+def normalize_permissions(path, dir_mode=0o755, file_mode=0o644, jobs=PERMISSION_JOBS):
+    """
+    Applies the modes provided to a directory and all directories and files below it, only
+    changing those which differ.  Directories are scanned in parallel.
+
+    :param path: The directory to normalise.
+    :param dir_mode: The mode to apply to directories.
+    :param file_mode: The mode to apply to files.
+    :param jobs: The number of directories to scan in parallel.
+
+    :return: The number of modes that were changed.
+    """
+    changed = 0
+
+    if stat.S_IMODE(os.lstat(path).st_mode) != dir_mode:
+        os.chmod(path, dir_mode)
+        changed += 1
+
+    # Sub-directories are only scanned once their own mode has been corrected
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(normalize_directory_permissions, path, dir_mode, file_mode)
+        }
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory_changed, subdirs = future.result()
+                changed += directory_changed
+                futures |= {
+                    executor.submit(normalize_directory_permissions, subdir, dir_mode, file_mode)
+                    for subdir in subdirs
+                }
+
+    return changed
+
+
+def omnisphere_steam_library(music_software_source, destination_basedir, event_log=None):
     print()
     print(f'{BOLD}Spectrasonics STEAM Library{ENDC}')
 
@@ -201,16 +727,24 @@ def omnisphere_steam_library(music_software_source, destination_basedir):
     print(f'{BLUE}Installing STEAM library into {destination}{ENDC}')
     print()
 
+    if event_log is None:
+        event_log = EventLog()
+
     run(f'mkdir -p "{destination}"')
-    run(
-        'rsync --archive --info=progress2 --human-readable --exclude=.DS_Store '
-        f'"{source}" "{destination}"'
-    )
 
+    # Permissions are corrected by rsync as files are copied
+    with event_log.measure('copy', 'STEAM', path=destination):
+        run(
+            'rsync --archive --chmod=D755,F644 --info=progress2 --human-readable '
+            f'--exclude=.DS_Store "{source}" "{destination}"'
+        )
+
+    # Correct anything rsync didn't copy (e.g. files which only exist in the destination)
     print()
     print(f'{BLUE}Correcting permissions for files and folders in {destination}{ENDC}')
-    run(f'find "{destination}" -type d -exec chmod 755 "{{}}" ;')
-    run(f'find "{destination}" -type f -exec chmod 644 "{{}}" ;')
+    with event_log.measure('permissions', 'STEAM') as metrics:
+        changed = metrics['changed'] = normalize_permissions(destination)
+    print(f'- {changed} permissions corrected')
 
     print()
     print(f'{BLUE}Cleaning up any existing STEAM symbolic link{ENDC}')
@@ -227,133 +761,474 @@ def omnisphere_steam_library(music_software_source, destination_basedir):
     print(f'{GREEN}Installation of the Omnisphere STEAM library complete{ENDC}')
 
 
-def kontakt_libraries_and_drum_samples(sample_libraries_source, destination_basedir):
-    print()
-    print(f'{BOLD}Kontakt Libraries & Drum Samples{ENDC}')
+def group_archives(archives):
+    """
+    Groups the archives provided so that each multipart RAR set is treated as a single archive.
 
-    library_paths_proc = run(
-        f'find "{sample_libraries_source}" -maxdepth 2 -mindepth 2 -type d',
-        stdout=subprocess.PIPE
-    )
+    :param archives: A list of ZIP and RAR archive paths.
 
-    for library_path in library_paths_proc.stdout.strip().split('\n'):
-        # Find all ZIP and RAR files present in the downloaded library
-        archives_proc = run(
-            f'find "{library_path}" -type f ( -name "*.zip" -o -name "*.rar" )',
-            stdout=subprocess.PIPE
+    :return: A list of archive sets, each being a list of paths starting with the archive to be
+             extracted.  Multipart sets which are missing their first part are omitted.
+    """
+    archive_sets = {}
+
+    for archive in sorted(archives):
+        match = MULTIPART_RE.search(archive)
+        if match:
+            archive_sets.setdefault(archive[:match.start()], []).append(
+                (int(match.group(1)), archive)
+            )
+        else:
+            archive_sets[archive] = [(1, archive)]
+
+    return [
+        [archive for _, archive in sorted(parts)]
+        for parts in archive_sets.values()
+        if min(parts)[0] == 1
+    ]
+
+
+def archive_stats(archive_set):
+    """Obtains the size and modification time of each part of an archive set."""
+    stats = []
+    for archive in archive_set:
+        archive_stat = os.stat(archive)
+        stats.append([archive_stat.st_size, archive_stat.st_mtime_ns])
+    return stats
+
+
+def archive_hash(archive_set):
+    """
+    Builds a content hash of an archive set from the size along with the first and last chunks
+    of each part.  Reading the full archives would take as long as extracting them, while
+    this is enough to recognise an archive which has been copied to another drive.
+    """
+    digest = hashlib.sha256()
+
+    for archive in archive_set:
+        with open(archive, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest.update(str(size).encode('utf-8'))
+            digest.update(f.read(HASH_CHUNK_SIZE))
+            if size > HASH_CHUNK_SIZE:
+                f.seek(max(HASH_CHUNK_SIZE, size - HASH_CHUNK_SIZE))
+                digest.update(f.read(HASH_CHUNK_SIZE))
+
+    return digest.hexdigest()
+
+
+def archive_extracted(manifest_entry, archive_set, stats, destination_subdir):
+    """
+    Determines whether an archive set has already been extracted successfully according to the
+    manifest.  The content hash is only checked when the sizes match but the modification times
+    don't (e.g. after restoring the archives to another backup drive).
+
+    :param manifest_entry: The manifest entry of the archive set (or None if there isn't one).
+    :param archive_set: The paths of the archive set.
+    :param stats: The current sizes and modification times of the archive set.
+    :param destination_subdir: The directory the archive set is to be extracted into.
+
+    :return: A boolean indicating whether the archive set may be skipped.
+    """
+    if (
+        not manifest_entry or
+        manifest_entry['result'] != 'complete' or
+        manifest_entry['destination'] != destination_subdir or
+        not os.path.isdir(destination_subdir)
+    ):
+        return False
+
+    if manifest_entry['parts'] == stats:
+        return True
+
+    if (
+        [size for size, _ in manifest_entry['parts']] == [size for size, _ in stats] and
+        manifest_entry['hash'] == archive_hash(archive_set)
+    ):
+        manifest_entry['parts'] = stats
+        return True
+
+    return False
+
+
+def extract_archive(archive_set, destination_subdir, device_semaphore):
+    """
+    Extracts an archive into the destination provided, capturing all output so that it may be
+    displayed without interleaving with other extractions.
+
+    :param archive_set: The paths of the archive (or all parts of a multipart RAR set).
+    :param destination_subdir: The directory to extract the archive into.
+    :param device_semaphore: A semaphore limiting concurrent reads from the archive's device.
+
+    :return: A tuple containing the content hash of the archive set, the completed process
+             of the extraction and a dict of timings and the bytes written (when known).
+    """
+    archive = archive_set[0]
+    metrics = {'bytes_written': None}
+    start = perf_counter()
+
+    with device_semaphore:
+        metrics['wait_seconds'] = perf_counter() - start
+        content_hash = archive_hash(archive_set)
+        metrics['hash_seconds'] = perf_counter() - start - metrics['wait_seconds']
+
+        if os.path.splitext(archive)[1] == '.rar':
+            command = (
+                f'unrar x -o+ -x"__MACOSX" -x"*.DS_Store" "{archive}" "{destination_subdir}"'
+            )
+        else:
+            command = (
+                f'unzip -q -o "{archive}" -x "__MACOSX/*" "*.DS_Store" -d "{destination_subdir}"'
+            )
+
+            # The uncompressed size is available from the ZIP central directory
+            try:
+                with zipfile.ZipFile(archive) as archive_zip:
+                    metrics['bytes_written'] = sum(
+                        info.file_size for info in archive_zip.infolist()
+                    )
+            except (OSError, zipfile.BadZipFile):
+                pass
+
+        extract_start = perf_counter()
+        extract_proc = run(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, errors='replace'
         )
+        metrics['seconds'] = perf_counter() - extract_start
 
-        if not archives_proc.stdout:
-            continue
+    return content_hash, extract_proc, metrics
 
-        # Determine the vendor of the library
-        vendor = os.path.basename(os.path.dirname(library_path))
 
-        # Determine the library name and remove the vendor name to remove redundancy
-        library = os.path.basename(library_path)
-        if library.startswith(f'{vendor} '):
-            library = library[len(f'{vendor} '):]
+def finish_library(vendor, library, destination, base_dir, installer, performed_action):
+    """
+    Strips the base directory and runs the installer of a library once it is extracted.
 
-        # Build the destination base directory
-        destination = f'{destination_basedir}/{vendor}/{library}'
+    :return: A boolean indicating whether the library was finished successfully.
+    """
+    success = True
 
-        print()
-        print(f'{BLUE}Processing {vendor} {library}{ENDC}')
+    print()
+    print(f'{BLUE}Finishing {vendor} {library}{ENDC}')
+
+    if base_dir:
+        if os.path.isdir(f'{destination}/{base_dir}'):
+            print(f'{BLUE}Stripping base directory of {base_dir}{ENDC}')
+            mv_proc = run(f'mv "{destination}/{base_dir}/"* "{destination}/"', shell=True)
+            rmdir_proc = run(f'rmdir "{destination}/{base_dir}/"')
+            if mv_proc.returncode != 0 or rmdir_proc.returncode != 0:
+                print(f'{RED}Unable to strip the base directory {base_dir}{ENDC}')
+                success = False
+        else:
+            print(f'{RED}The base directory {base_dir} does not exist{ENDC}')
+
+    if installer:
+        if os.path.isfile(f'{destination}/{installer}'):
+            performed_action = True
+            print(f'{BLUE}Running installer {installer}{ENDC}')
+            with INSTALLER_LOCK:
+                installer_proc = sudo(
+                    f'installer -package "{destination}/{installer}" -target /'
+                )
+            if installer_proc.returncode != 0:
+                print(f'{RED}The installer {installer} failed{ENDC}')
+                success = False
+        else:
+            print(f'{RED}The installer {installer} does not exist{ENDC}')
+            success = False
 
-        # If present, read the library config to override library variables
-        library_config_path = f'{library_path}/.library.yaml'
-        library_config = {}
+    if not success:
+        print(f'{RED}Installation of {vendor} {library} is incomplete{ENDC}')
+    elif performed_action:
+        print(f'{GREEN}Installation of {vendor} {library} complete{ENDC}')
+    else:
+        print(f'{RED}No action required for {vendor} {library}{ENDC}')
 
-        if os.path.isfile(library_config_path):
-            print(f'{BLUE}Loading the library YAML config file{ENDC}')
-            with open(library_config_path) as f:
-                try:
-                    library_config = yaml.load(f)
-                except yaml.scanner.ScannerError:
-                    print(
-                        f'{RED}Unable to load the library config file due to a syntax error{ENDC}'
+    return success
+
+
+def kontakt_libraries_and_drum_samples(
+    sample_libraries_source, destination_basedir, index=None, jobs=EXTRACT_JOBS,
+    jobs_per_device=EXTRACT_JOBS_PER_DEVICE, event_log=None
+):
+    print()
+    print(f'{BOLD}Kontakt Libraries & Drum Samples{ENDC}')
+
+    if index is None:
+        index = scan_source(sample_libraries_source)
+    if event_log is None:
+        event_log = EventLog()
+
+    # Archives which have already been extracted and libraries which have been finished (base
+    # directory stripped and installer run) are tracked in a manifest so that an interrupted
+    # install may be resumed
+    manifest_path = os.path.join(destination_basedir, MANIFEST_FILENAME)
+    manifest = load_state(manifest_path)
+    if 'archives' not in manifest:
+        manifest = {'archives': {}, 'libraries': {}}
+    archives_manifest = manifest['archives']
+    libraries_manifest = manifest['libraries']
+
+    # Archives are extracted by a pool of workers while libraries are prepared, each library
+    # being finished once all of its archives have been extracted
+    libraries = {}
+    pending = {}
+    library_metrics = {}
+    device_semaphores = {}
+    futures = {}
+
+    # Archives extracting into the same directory are chained so that they run one after
+    # another in sorted order (allowing later archives such as updates to overwrite earlier
+    # ones), while different directories are extracted in parallel
+    chained = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        def submit_extraction(
+            library_path, archive_set, archive_relative, subdir, destination_subdir,
+            manifest_key
+        ):
+            # Limit the number of archives being read from each device at once
+            device = os.stat(archive_set[0]).st_dev
+            if device not in device_semaphores:
+                device_semaphores[device] = threading.Semaphore(jobs_per_device)
+
+            future = executor.submit(
+                extract_archive, archive_set, destination_subdir, device_semaphores[device]
+            )
+            futures[future] = (
+                library_path, archive_relative, subdir, destination_subdir, manifest_key,
+                sum(size for size, _ in archives_manifest[manifest_key]['parts'])
+            )
+
+        try:
+            for library_path, library_files in sorted(index['libraries'].items()):
+                # Skip libraries without any ZIP or RAR files
+                if not library_files['archives']:
+                    continue
+
+                # Determine the vendor of the library
+                vendor = os.path.basename(os.path.dirname(library_path))
+
+                # Determine the library name and remove the vendor name to remove redundancy
+                library = os.path.basename(library_path)
+                if library.startswith(f'{vendor} '):
+                    library = library[len(f'{vendor} '):]
+
+                # Build the destination base directory
+                destination = f'{destination_basedir}/{vendor}/{library}'
+
+                print()
+                print(f'{BLUE}Processing {vendor} {library}{ENDC}')
+
+                # If present, read the library config to override library variables
+                library_config_path = library_files['config']
+                library_config = {}
+
+                if library_config_path:
+                    print(f'{BLUE}Loading the library YAML config file{ENDC}')
+                    with open(library_config_path) as f:
+                        try:
+                            library_config = yaml.safe_load(f) or {}
+                        except yaml.YAMLError:
+                            print(
+                                f'{RED}Unable to load the library config file due to a '
+                                f'syntax error{ENDC}'
+                            )
+
+                base_dir = library_config.get('base_dir', '')
+                installer = library_config.get('installer', None)
+                extract_subdirs = library_config.get('extract_subdirs', [])
+
+                # Determine which archives still need to be extracted
+                extractions = []
+                skipped = 0
+
+                for archive_set in group_archives(library_files['archives']):
+                    archive = archive_set[0]
+
+                    # Determine the destination (also taking into account sub-directories)
+                    archive_relative = archive.replace(f'{library_path}/', '')
+                    subdir = os.path.dirname(archive_relative)
+                    if subdir == '.':
+                        subdir = ''
+
+                    if archive_relative in extract_subdirs:
+                        subdir = os.path.join(subdir, base_dir, extract_subdirs[archive_relative])
+
+                    if subdir:
+                        destination_subdir = os.path.join(destination, subdir)
+                    else:
+                        destination_subdir = destination
+
+                    # Archives are keyed relative to the source so that the manifest remains
+                    # valid when restoring from another backup drive
+                    manifest_key = os.path.relpath(archive, sample_libraries_source)
+                    stats = archive_stats(archive_set)
+
+                    if archive_extracted(
+                        archives_manifest.get(manifest_key), archive_set, stats,
+                        destination_subdir
+                    ):
+                        skipped += 1
+                        continue
+
+                    archives_manifest[manifest_key] = {
+                        'parts': stats,
+                        'hash': None,
+                        'destination': destination_subdir,
+                        'result': 'started'
+                    }
+                    extractions.append(
+                        (archive_set, archive_relative, subdir, destination_subdir, manifest_key)
                     )
 
-        base_dir = library_config.get('base_dir', '')
-        installer = library_config.get('installer', None)
-        extract_subdirs = library_config.get('extract_subdirs', [])
+                if skipped:
+                    print(f'{BLUE}Skipping {skipped} previously extracted library archives{ENDC}')
 
-        if base_dir and os.path.isdir(destination) and os.listdir(destination):
-            print(f'Moving contents from base directory of {base_dir}')
+                library_key = os.path.relpath(library_path, sample_libraries_source)
+                library_manifest = libraries_manifest.get(library_key)
 
-            tempdir = tempfile.mkdtemp(prefix='samplelibs.', dir=destination_basedir)
-            run(f'mv "{destination}/"* "{tempdir}"', shell=True)
+                library_state = {
+                    'vendor': vendor,
+                    'library': library,
+                    'destination': destination,
+                    'base_dir': base_dir,
+                    'installer': installer,
+                    'performed_action': True
+                }
 
-            run(f'mkdir -p "{destination}/{base_dir}/"')
-            run(f'mv "{tempdir}/"* "{destination}/{base_dir}/"', shell=True)
+                # Libraries with nothing left to extract are only skipped once they have been
+                # finished, otherwise the finish step is run again (e.g. after an interruption)
+                if not extractions:
+                    if library_manifest and library_manifest['finished']:
+                        print(f'{GREEN}{vendor} {library} is already installed{ENDC}')
+                        continue
 
-            run(f'rmdir "{tempdir}"')
+                    library_state['performed_action'] = bool(library_manifest)
+                    if finish_library(**library_state):
+                        libraries_manifest[library_key] = {'finished': True}
+                        save_state(manifest_path, manifest)
+                    continue
 
-        # Track whether anything was needed to be done
-        performed_action = False
+                libraries_manifest[library_key] = {'finished': False}
 
-        print(f'{BLUE}Extracting library archives{ENDC}')
+                # An interrupted install has already placed its contents under the base directory
+                resuming = library_manifest is not None and not library_manifest['finished']
 
-        for archive in archives_proc.stdout.strip().split('\n'):
-            # Check for multipart archives and only extract part 1
-            if (
-                re.search('\.part[0-9]+\.rar$', archive) and
-                not re.search('\.part0*1\.rar$', archive)
-            ):
-                continue
+                if (
+                    base_dir and not resuming and
+                    os.path.isdir(destination) and os.listdir(destination)
+                ):
+                    print(f'Moving contents from base directory of {base_dir}')
 
-            performed_action = True
+                    tempdir = tempfile.mkdtemp(prefix='samplelibs.', dir=destination_basedir)
+                    run(f'mv "{destination}/"* "{tempdir}"', shell=True)
 
-            # Determine the destination (also taking into account sub-directories)
-            archive_relative = archive.replace(f'{library_path}/', '')
-            subdir = os.path.dirname(archive_relative)
-            if subdir == '.':
-                subdir = ''
+                    run(f'mkdir -p "{destination}/{base_dir}/"')
+                    run(f'mv "{tempdir}/"* "{destination}/{base_dir}/"', shell=True)
 
-            if archive_relative in extract_subdirs:
-                subdir = os.path.join(subdir, base_dir, extract_subdirs[archive_relative])
+                    run(f'rmdir "{tempdir}"')
 
-            if subdir:
-                destination_subdir = os.path.join(destination, subdir)
-            else:
-                destination_subdir = destination
+                libraries[library_path] = library_state
+                pending[library_path] = len(extractions)
+                library_metrics[library_path] = {
+                    'start': perf_counter(), 'bytes_read': 0, 'bytes_written': None
+                }
 
-            run(f'mkdir -p "{destination_subdir}"')
+                print(f'{BLUE}Queueing {len(extractions)} library archives{ENDC}')
 
-            # Extract the archive
-            if subdir:
-                print(f'{YELLOW}- {archive_relative} -> {subdir}{ENDC}')
-            else:
-                print(f'{YELLOW}- {archive_relative}{ENDC}')
+                for (
+                    archive_set, archive_relative, subdir, destination_subdir, manifest_key
+                ) in extractions:
+                    run(f'mkdir -p "{destination_subdir}"')
 
-            if os.path.splitext(archive)[1] == '.rar':
-                run(
-                    f'unrar x -o+ -x"__MACOSX" -x"*.DS_Store" "{archive}" "{destination_subdir}"',
-                    stdout=DEVNULL
-                )
-            else:
-                run(f'unzip -q -o "{archive}" -x "__MACOSX/*" "*.DS_Store" -d "{destination_subdir}"')
+                    extraction = (
+                        library_path, archive_set, archive_relative, subdir,
+                        destination_subdir, manifest_key
+                    )
+                    if destination_subdir in chained:
+                        chained[destination_subdir].append(extraction)
+                    else:
+                        chained[destination_subdir] = deque()
+                        submit_extraction(*extraction)
 
-        if base_dir:
-            if os.path.isdir(f'{destination}/{base_dir}'):
-                print(f'{BLUE}Stripping base directory of {base_dir}{ENDC}')
-                run(f'mv "{destination}/{base_dir}/"* "{destination}/"', shell=True)
-                run(f'rmdir "{destination}/{base_dir}/"')
-            else:
-                print(f'{RED}The base directory {base_dir} does not exist{ENDC}')
+            # Record the queued archives as started so that partial extractions are redone
+            save_state(manifest_path, manifest)
 
-        if installer:
-            if os.path.isfile(f'{destination}/{installer}'):
-                performed_action = True
-                print(f'{BLUE}Running installer {installer}{ENDC}')
-                sudo(f'installer -package "{destination}/{installer}" -target /')
-            else:
-                print(f'{RED}The installer {installer} does not exist{ENDC}')
+            print()
+            print(f'{BLUE}Extracting library archives{ENDC}')
+
+            # Report each extraction as it completes, start the next archive chained to the
+            # same directory and finish libraries once all of their archives have been extracted
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    (
+                        library_path, archive_relative, subdir, destination_subdir,
+                        manifest_key, size
+                    ) = futures.pop(future)
+                    library_state = libraries[library_path]
+                    content_hash, extract_proc, metrics = future.result()
+
+                    if chained[destination_subdir]:
+                        submit_extraction(*chained[destination_subdir].popleft())
+                    else:
+                        del chained[destination_subdir]
+
+                    event_log.record(
+                        'archive', archive_relative, metrics['seconds'], bytes_read=size,
+                        bytes_written=metrics['bytes_written'],
+                        wait_seconds=round(metrics['wait_seconds'], 3),
+                        hash_seconds=round(metrics['hash_seconds'], 3),
+                        library=f'{library_state["vendor"]} {library_state["library"]}',
+                        result='complete' if extract_proc.returncode == 0 else 'failed'
+                    )
 
-        if performed_action:
-            print(f'{GREEN}Installation of {vendor} {library} complete{ENDC}')
-        else:
-            print(f'{RED}No action required for {vendor} {library}{ENDC}')
+                    library_totals = library_metrics[library_path]
+                    library_totals['bytes_read'] += size
+                    if metrics['bytes_written'] is not None:
+                        library_totals['bytes_written'] = (
+                            (library_totals['bytes_written'] or 0) + metrics['bytes_written']
+                        )
+
+                    library_name = f'{library_state["vendor"]} {library_state["library"]}'
+                    label = f'{library_name}: {archive_relative}'
+                    if subdir:
+                        label = f'{label} -> {subdir}'
+
+                    if extract_proc.returncode == 0:
+                        print(f'{YELLOW}- {label}{ENDC}')
+                    else:
+                        print(
+                            f'{RED}- {label} (failed with exit code {extract_proc.returncode})'
+                            f'{ENDC}'
+                        )
+                        print(extract_proc.stdout.rstrip())
+
+                    archives_manifest[manifest_key]['hash'] = content_hash
+                    archives_manifest[manifest_key]['result'] = (
+                        'complete' if extract_proc.returncode == 0 else 'failed'
+                    )
+                    save_state(manifest_path, manifest)
+
+                    pending[library_path] -= 1
+                    if pending[library_path] == 0:
+                        if finish_library(**library_state):
+                            libraries_manifest[
+                                os.path.relpath(library_path, sample_libraries_source)
+                            ] = {'finished': True}
+                            save_state(manifest_path, manifest)
+                        event_log.record(
+                            'library', f'{library_state["vendor"]} {library_state["library"]}',
+                            perf_counter() - library_totals['start'],
+                            bytes_read=library_totals['bytes_read'],
+                            bytes_written=library_totals['bytes_written']
+                        )
+
+        except KeyboardInterrupt:
+            # Running extractions receive the interrupt too, so only queued ones are cancelled
+            for future in futures:
+                future.cancel()
+            raise
 
     print()
     print(f'{GREEN}Installation of Kontakt libraries and drum samples complete{ENDC}')
@@ -381,6 +1256,12 @@ def main():
     sudo_enabled = False
     return_code = 0
 
+    # Log timing events alongside the manifest when the destination is available
+    event_log = EventLog(
+        os.path.join(DESTINATION_BASEDIR, EVENT_LOG_FILENAME)
+        if os.path.isdir(DESTINATION_BASEDIR) else None
+    )
+
     try:
         # Prompt the user for their sudo password (if required)
         sudo_check_proc = sudo('-vn', stderr=DEVNULL)
@@ -392,23 +1273,34 @@ def main():
         sudo('sed -i -e "s/^%admin.*/%admin  ALL=(ALL) NOPASSWD: ALL/" /etc/sudoers')
         sudo_enabled = True
 
+        # Index the sample library source once for use by all installers
+        print()
+        print(f'{BLUE}Scanning the sample library source{ENDC}')
+        with event_log.measure('stage', 'scan_source'):
+            index = scan_source(SAMPLE_LIBRARIES_SOURCE)
+
         # Install the various sample libraries
-        logic_pro_x_content(
-            sample_libraries_source=SAMPLE_LIBRARIES_SOURCE,
-            destination_basedir=DESTINATION_BASEDIR
-        )
-        komplete_libraries(
-            sample_libraries_source=SAMPLE_LIBRARIES_SOURCE,
-            destination_basedir=DESTINATION_BASEDIR
-        )
-        omnisphere_steam_library(
-            music_software_source=MUSIC_SOFTWARE_SOURCE,
-            destination_basedir=DESTINATION_BASEDIR
-        )
-        kontakt_libraries_and_drum_samples(
-            sample_libraries_source=SAMPLE_LIBRARIES_SOURCE,
-            destination_basedir=DESTINATION_BASEDIR
-        )
+        for stage, kwargs in [
+            (logic_pro_x_content, {
+                'sample_libraries_source': SAMPLE_LIBRARIES_SOURCE,
+                'index': index
+            }),
+            (komplete_libraries, {
+                'sample_libraries_source': SAMPLE_LIBRARIES_SOURCE,
+                'index': index
+            }),
+            (omnisphere_steam_library, {
+                'music_software_source': MUSIC_SOFTWARE_SOURCE
+            }),
+            (kontakt_libraries_and_drum_samples, {
+                'sample_libraries_source': SAMPLE_LIBRARIES_SOURCE,
+                'index': index
+            })
+        ]:
+            with event_log.measure(
+                'stage', stage.__name__, path=DESTINATION_BASEDIR, aggregate=True
+            ):
+                stage(destination_basedir=DESTINATION_BASEDIR, event_log=event_log, **kwargs)
 
     except KeyboardInterrupt:
         print(
@@ -423,6 +1315,8 @@ def main():
             sudo('sed -i -e "s/^%admin.*/%admin  ALL=(ALL) ALL/" /etc/sudoers')
 
         print()
+        event_log.summary()
+        print()
 
     exit(return_code)
 
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
-from collections import defaultdict
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import hashlib
+from itertools import groupby
+import json
 import os
 import sqlite3
 import sys
+import tempfile
+from urllib.request import pathname2url
 
 
 # Colours
@@ -13,90 +20,267 @@ YELLOW = '\033[93m'
 BLUE = '\033[94m'
 ENDC = '\033[0m'
 
+# The size of each read when hashing library files
+HASH_BUFFER_SIZE = 8 * 1024 * 1024
 
-def main():
-    # Obtain a search term if provided
-    md5sums = False
-    search = None
-    if len(sys.argv) > 1:
-        for arg in sys.argv[1:]:
-            if arg in ['-h', '--help']:
-                print(f'Usage: {__file__} [-h/--help] [-m/--md5sums] [<search>]')
-                exit()
-            elif arg in ['-m', '--md5sums']:
-                md5sums = True
-            else:
-                search = arg
-
-    # Connect to the Spitfire Audio Library Manager SQLite database
+# The cache of file digests which allows verification to skip unchanged files
+DIGEST_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), 'Library', 'Caches', 'spitfire_downloads.json'
+)
+
+
+def md5_file(filepath):
+    """Calculates the MD5 digest of a file using large reads."""
+    digest = hashlib.md5()
+    with open(filepath, 'rb', buffering=0) as f:
+        buffer = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def load_digest_cache(cache_path):
+    """Loads the digest cache, returning an empty cache if it doesn't exist."""
     try:
-        conn = sqlite3.connect(os.path.join(
-            os.path.expanduser('~'), 'Library', 'Application Support',
-            'com.spitfireaudio.Spitfire_Audio_Library_Manager',
-            'Spitfire_Audio_Library_Manager.storedata'
-        ))
-    except sqlite3.OperationalError:
-        print(f'{RED}Error: Unable to open the Spitfire SQLite database{ENDC}')
-        exit(1)
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_digest_cache(cache_path, cache):
+    """Atomically saves the digest cache."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    cache_fd, cache_temp_path = tempfile.mkstemp(
+        prefix=f'{os.path.basename(cache_path)}.', dir=os.path.dirname(cache_path)
+    )
+    with os.fdopen(cache_fd, 'w') as f:
+        json.dump(cache, f)
+    os.replace(cache_temp_path, cache_path)
+
+
+def verify_files(expected, cache_path=DIGEST_CACHE_PATH, jobs=None):
+    """
+    Verifies library files against their expected MD5 checksums.  Files are hashed in parallel
+    and digests are cached by path, size and modification time so that only new or changed
+    files are hashed when verifying again.
+
+    :param expected: A dict mapping each file path to its expected MD5 checksum.
+    :param cache_path: The path of the digest cache.
+    :param jobs: The number of files to hash in parallel (defaulting to the number of CPUs).
+
+    :return: A tuple containing lists of the mismatched and missing file paths.
+    """
+    cache = load_digest_cache(cache_path)
+    mismatched = []
+    missing = []
+
+    def check(filepath, digest):
+        if digest == expected[filepath]:
+            print(f'{GREEN}OK{ENDC}  {filepath}')
+        else:
+            print(f'{RED}MISMATCH{ENDC}  {filepath}')
+            mismatched.append(filepath)
+
+    # Check files against the cache and determine which need to be hashed
+    to_hash = {}
+    for filepath in sorted(expected):
+        try:
+            file_stat = os.stat(filepath)
+        except OSError:
+            print(f'{RED}MISSING{ENDC}  {filepath}')
+            missing.append(filepath)
+            continue
+
+        key = [file_stat.st_size, file_stat.st_mtime_ns]
+        cached = cache.get(filepath)
+        if cached and cached[:2] == key:
+            check(filepath, cached[2])
+        else:
+            to_hash[filepath] = key
+
+    # Hash the remaining files in parallel, saving the cache even if interrupted
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(md5_file, filepath): filepath for filepath in to_hash
+            }
+            for future in as_completed(futures):
+                filepath = futures[future]
+                try:
+                    digest = future.result()
+                except OSError:
+                    print(f'{RED}MISSING{ENDC}  {filepath}')
+                    missing.append(filepath)
+                    continue
+
+                cache[filepath] = to_hash[filepath] + [digest]
+                check(filepath, digest)
+    finally:
+        save_digest_cache(cache_path, cache)
+
+    return mismatched, missing
+
+
+def library_files(conn, search=None, by_library=True):
+    """
+    Generates the details of each library file with the file path built by SQLite and duplicate
+    files removed.  The groups (or libraries) are queried first and the files of each are then
+    queried separately using the index Core Data maintains on the library foreign key, so only
+    the files of one group or library are sorted at a time rather than every file being sorted
+    before the first is returned.
 
-    # Build the main SQL to obtain library details
-    sql = ('''
-        SELECT l.zdisplaygroup AS 'Library Group',
+    :param conn: The connection to the Spitfire SQLite database.
+    :param search: A term which the library groups must contain.
+    :param by_library: Whether files are ordered by library within each group (otherwise only by
+                       filename).
+
+    :return: A generator of (group, library, filename, md5, filepath) tuples.
+    """
+    libraries_sql = 'SELECT z_pk, zdisplaygroup, ztitle FROM zlibrary'
+    libraries_args = []
+
+    # Filter the libraries by the search term if provided
+    if search:
+        libraries_sql += ' WHERE zdisplaygroup LIKE ?'
+        libraries_args.append(f'%{search}%')
+
+    libraries_sql += ' ORDER BY zdisplaygroup, ztitle'
+
+    files_sql = '''
+        SELECT DISTINCT
+               l.zdisplaygroup AS 'Library Group',
                l.ztitle AS Library,
                lf.zfilename AS Filename,
                lf.zchecksum AS MD5,
-               l.zinstallationfolder AS Folder,
-               lf.zinstallationpath AS Path
-        FROM zlibraryfile AS lf
-        JOIN zlibrary AS l ON l.z_pk = lf.zlibrary
-    ''')
-    args = []
-
-    # Filter the SQL by the search term if provided
-    if search:
-        sql += " WHERE l.zdisplaygroup LIKE ?"
-        args.append(f'%{search}%')
+               rtrim(l.zinstallationfolder, '/') || '/' ||
+               CASE
+                   WHEN lf.zinstallationpath IS NULL OR lf.zinstallationpath = '' THEN ''
+                   ELSE rtrim(lf.zinstallationpath, '/') || '/'
+               END ||
+               lf.zfilename AS Filepath
+        FROM zlibrary AS l
+        JOIN zlibraryfile AS lf ON lf.zlibrary = l.z_pk
+        WHERE lf.zlibrary IN ({placeholders})
+        ORDER BY lf.zfilename
+    '''
 
-    cursor = conn.execute(sql, args)
-    spitfire_files = defaultdict(set)
+    try:
+        libraries = conn.execute(libraries_sql, libraries_args).fetchall()
+
+        if by_library:
+            units = groupby(libraries, key=lambda library: library[1:])
+        else:
+            units = groupby(libraries, key=lambda library: library[1])
 
-    while True:
-        # Grab the current row
-        row = cursor.fetchone()
-        if row is None:
-            break
+        for _, unit_libraries in units:
+            library_ids = [library_id for library_id, group, title in unit_libraries]
+            yield from conn.execute(
+                files_sql.format(placeholders=', '.join('?' * len(library_ids))), library_ids
+            )
+    except sqlite3.DatabaseError:
+        print(f'{RED}Error: Unable to query the Spitfire SQLite database{ENDC}')
+        exit(1)
 
-        # Unpack the row
-        group, library, filename, md5, folder, path = row
 
-        # Save the record into our data structure
-        key = group if md5sums else f'{group} : {library}'
+def main():
+    # Create the argument parser
+    parser = argparse.ArgumentParser(
+        description='list the files and checksums of Spitfire Audio libraries'
+    )
+    parser.add_argument(
+        'search', nargs='?', help='only include library groups containing this search term'
+    )
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument(
+        '-m', '--md5sums', action='store_true',
+        help='print checksums in a format compatible with md5sum --check'
+    )
+    mode_group.add_argument(
+        '-v', '--verify', action='store_true',
+        help='verify the installed library files against their checksums'
+    )
+    mode_group.add_argument(
+        '-f', '--format', choices=['csv', 'json', 'text'], default='text',
+        help='the format of the library file listing'
+    )
 
-        spitfire_files[key].add((filename, md5, folder, path))
+    # Parse arguments
+    args = parser.parse_args()
+
+    # Connect to the Spitfire Audio Library Manager SQLite database (read-only so that the
+    # database isn't created when missing)
+    spitfire_db_path = os.path.join(
+        os.path.expanduser('~'), 'Library', 'Application Support',
+        'com.spitfireaudio.Spitfire_Audio_Library_Manager',
+        'Spitfire_Audio_Library_Manager.storedata'
+    )
+    try:
+        conn = sqlite3.connect(f'file:{pathname2url(spitfire_db_path)}?mode=ro', uri=True)
+    except sqlite3.OperationalError:
+        print(f'{RED}Error: Unable to open the Spitfire SQLite database{ENDC}')
+        exit(1)
+
+    # Files are streamed in order of group, library (unless listing checksums) and filename
+    files = library_files(conn, args.search, by_library=not args.md5sums)
+
+    # Verify the installed files against their checksums
+    if args.verify:
+        expected = {
+            filepath: md5.lower() for group, library, filename, md5, filepath in files if md5
+        }
+
+        mismatched, missing = verify_files(expected)
+
+        print()
+        if mismatched or missing:
+            print(
+                f'{RED}Verification failed with {len(mismatched)} mismatched and '
+                f'{len(missing)} missing files (out of {len(expected)}){ENDC}'
+            )
+            exit(1)
+        else:
+            print(f'{GREEN}All {len(expected)} files verified successfully{ENDC}')
+            exit()
 
     # Print MD5 checksums of all items grouped by library
-    if md5sums:
-        for library, files in sorted(spitfire_files.iteritems()):
-            for filename, md5, folder, path in sorted(files, key=lambda x: x[0]):
-                if path:
-                    filepath = os.path.join(folder, path, filename)
-                else:
-                    filepath = os.path.join(folder, filename)
+    elif args.md5sums:
+        for group, library, filename, md5, filepath in files:
+            print(f'{md5}  {filepath}')
 
-                print(f'{md5}  {filepath}')
+    # Print library information as CSV
+    elif args.format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['group', 'library', 'filename', 'md5', 'path'])
+        for row in files:
+            writer.writerow(row)
+
+    # Print library information as a JSON list which is written as each row is read
+    elif args.format == 'json':
+        print('[', end='')
+        for index, (group, library, filename, md5, filepath) in enumerate(files):
+            print(',' if index else '')
+            print('  ' + json.dumps({
+                'group': group,
+                'library': library,
+                'filename': filename,
+                'md5': md5,
+                'path': filepath
+            }), end='')
+        print()
+        print(']')
 
     # Print library information
     else:
-        for library, files in sorted(spitfire_files.iteritems()):
+        for (group, library), rows in groupby(files, key=lambda row: row[:2]):
             print()
-            print(f'{YELLOW}{library}{ENDC}')
+            print(f'{YELLOW}{group} : {library}{ENDC}')
             print()
-            for filename, md5, folder, path in sorted(files, key=lambda x: x[0]):
-                if path:
-                    filepath = os.path.join(folder, path, filename)
-                else:
-                    filepath = os.path.join(folder, filename)
-
+            for group, library, filename, md5, filepath in rows:
                 print(f'{BLUE}{md5}{ENDC}  {GREEN}{filepath}{ENDC}')
         print()
 
@@ -17,18 +17,34 @@ options:
         required. Both regular applications and App Store application plist
         files are searched if a domain is specified.  You may specify
         NSGlobalDomain or "Apple Global Domain" to update global preferences.
-    required: true
+        Either dest or domains must be specified.
+    required: false
     default: null
   values:
     description:
       - Values which sould be set or merged represented as a data structure
+        (required when dest is specified)
     type: dict
-    required: true
+    required: false
+    default: null
+  domains:
+    description:
+      - A list of domains to update in a single invocation.  Each item is a
+        dict containing a domain and values key along with an optional
+        container key, taking the same meaning as the dest, values and
+        container options respectively.  Items which resolve to the same plist
+        file are merged in order and the file is only read and written once.
+        An optional become key is accepted so that host variables may be
+        passed through as-is, but privilege escalation must be requested on
+        the task itself.
+    type: list
+    required: false
     default: null
   container:
     description:
-      - The container name of a sandboxed application (required for App
-        Store apps).
+      - The container name of a sandboxed application.  If not specified and
+        the domain doesn't exist in the user's preferences, the containers
+        and group containers are searched for the domain.
     required: false
     default: null
   backup:
@@ -38,11 +54,48 @@ options:
     required: false
     default: "no"
     choices: [ "yes", "no" ]
+  fsync:
+    description:
+      - Flush the plist file and its directory to disk after it is written.
+        Files are always written to a temporary file and renamed into place,
+        and are left untouched if their contents would not change.
+    required: false
+    default: "no"
+    choices: [ "yes", "no" ]
+  format:
+    description:
+      - The format to write the plist file in.  By default the format of an
+        existing file (binary or XML) is retained and new files are written
+        as XML.
+    required: false
+    default: "auto"
+    choices: [ "auto", "binary", "xml" ]
+  cache:
+    description:
+      - Cache parsed plist files under the Ansible temporary directory so that
+        a file is only parsed again when its inode, size or modification time
+        changes.  An index of the domains found in containers is also kept
+        here.
+    required: false
+    default: "yes"
+    choices: [ "yes", "no" ]
 notes:
    - All data types are supported by this module (boolean, int, float, string,
      date, array and dict).
    - If a chosen key exists with its own structure, then the plist module
      will merge the value specified with it.
+   - A key may be deleted by setting its value to __absent__.
+   - Lists are replaced by default.  To merge a list instead, specify a dict
+     containing a __merge__ key with the strategy and a __value__ key with
+     the items.  The append-unique strategy appends items which are not
+     already present, the set strategy ensures the list contains exactly
+     the items provided regardless of order and the index strategy sets the
+     list items at each index provided in a dict of index to item.
+   - When using domains, the changed status of each domain is returned in
+     the results list.
+   - The key paths which were added, modified or changed type are returned
+     in changes (or in the results list when using domains) and are also
+     shown when running with --diff.
 '''
 
 EXAMPLES = '''
@@ -67,102 +120,690 @@ plist:
         - Python
         - Ansible
         - Pumpkins
+
+plist:
+  dest: com.ansible.something
+  values:
+    obsolete: __absent__
+    recent:
+      __merge__: append-unique
+      __value__:
+        - Ansible
+    shortcuts:
+      __merge__: index
+      __value__:
+        0: Pumpkins
+
+plist:
+  domains:
+    - domain: NSGlobalDomain
+      values:
+        KeyRepeat: 2
+    - domain: com.seriflabs.affinityphoto
+      container: com.seriflabs.affinityphoto
+      values:
+        com.seriflabs.ShowWelcomeScreen: false
 '''
 
+import copy
+import hashlib
 import os
+import pickle
 import plistlib
+import shutil
+import tempfile
+
+# Special values used to delete keys and to choose a list merge strategy
+ABSENT = '__absent__'
+MERGE_KEY = '__merge__'
+VALUE_KEY = '__value__'
+MERGE_STRATEGIES = ['replace', 'append-unique', 'set', 'index']
+
+# Container directories which are searched for the preferences of sandboxed
+# apps along with the relative path of the preferences in each container
+CONTAINER_DIRS = [
+    ('~/Library/Containers', os.path.join('Data', 'Library', 'Preferences')),
+    ('~/Library/Group Containers', os.path.join('Library', 'Preferences')),
+]
+
+# The default location of the plist cache and domain index
+DEFAULT_CACHE_DIR = '~/.ansible/tmp/plist-cache'
+
+# Domain indexes which have been loaded in this process keyed by cache dir
+DOMAIN_INDEXES = {}
+
+def resolve_path(dest, container=None, cache_dir=None):
+    if not dest.startswith('/') and not dest.startswith('~'):
+        if dest in ['NSGlobalDomain', 'Apple Global Domain']:
+            return os.path.expanduser(
+                '~/Library/Preferences/.GlobalPreferences.plist'
+            )
+        elif container:
+            return os.path.expanduser(
+                '~/Library/Containers/%s/Data/Library/Preferences/%s.plist' %
+                (container, dest)
+            )
+
+        # Regular preferences take precedence, followed by the preferences
+        # of sandboxed apps found in the domain index
+        user_plist = os.path.expanduser(
+            '~/Library/Preferences/%s.plist' % dest
+        )
+        if os.path.isfile(user_plist):
+            return user_plist
+
+        return find_domain(dest, cache_dir) or user_plist
+    else:
+        return os.path.expanduser(dest)
+
+def scan_domains():
+    """
+    Scans all container directories once and builds an index between each
+    domain and the path of its plist file.  The modification times of the
+    directories scanned are recorded so the index can be invalidated.
+    """
+    index = dict(roots={}, dirs={}, domains={})
+
+    for root, preferences_subdir in CONTAINER_DIRS:
+        root = os.path.expanduser(root)
+        index['roots'][root] = dir_mtime(root)
+
+        try:
+            containers = sorted(os.listdir(root))
+        except OSError:
+            continue
+
+        for container in containers:
+            preferences_dir = os.path.join(root, container, preferences_subdir)
+            try:
+                filenames = sorted(os.listdir(preferences_dir))
+            except OSError:
+                continue
+
+            index['dirs'][preferences_dir] = dir_mtime(preferences_dir)
 
-def do_plist(module, filename, values, backup=False):
-    working_values = values
-    changed = False
+            for filename in filenames:
+                if filename.endswith('.plist'):
+                    index['domains'].setdefault(
+                        filename[:-len('.plist')],
+                        os.path.join(preferences_dir, filename)
+                    )
 
+    return index
+
+def dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def index_changed(mtimes):
+    return any(dir_mtime(path) != mtime for path, mtime in mtimes.items())
+
+def write_pickle(cache_dir, path, obj):
+    """
+    Atomically writes the object to a pickle file within the cache directory.
+    The cache is only an optimisation, so failures are silently ignored.
+    """
+    temp_filename = None
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+
+        temp_fd, temp_filename = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(temp_fd, 'wb') as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+
+        os.rename(temp_filename, path)
+        temp_filename = None
+    except Exception:
+        pass
+    finally:
+        if temp_filename and os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+def load_domain_index(cache_dir=None):
+    """
+    Loads the domain index from the cache, rebuilding it if it is missing or
+    a container has since been added or removed.
+    """
+    if cache_dir in DOMAIN_INDEXES:
+        return DOMAIN_INDEXES[cache_dir]
+
+    index = None
+    if cache_dir:
+        try:
+            with open(os.path.join(cache_dir, 'domains.pickle'), 'rb') as f:
+                index = pickle.load(f)
+        except Exception:
+            pass
+
+    if index is None or index_changed(index['roots']):
+        index = scan_domains()
+        save_domain_index(index, cache_dir)
+
+    DOMAIN_INDEXES[cache_dir] = index
+    return index
+
+def save_domain_index(index, cache_dir=None):
+    if not cache_dir:
+        return
+
+    write_pickle(cache_dir, os.path.join(cache_dir, 'domains.pickle'), index)
+
+def find_domain(domain, cache_dir=None):
+    """
+    Finds the plist file of a domain belonging to a sandboxed app, returning
+    None if the domain can't be found in any container.
+    """
+    index = load_domain_index(cache_dir)
+
+    path = index['domains'].get(domain)
+    if path and os.path.isfile(path):
+        return path
+
+    # The domain may have been created or removed since the index was built
+    if index_changed(index['dirs']) or index_changed(index['roots']):
+        index.clear()
+        index.update(scan_domains())
+        save_domain_index(index, cache_dir)
+
+        path = index['domains'].get(domain)
+
+    return path
+
+def cache_path(cache_dir, filename):
+    digest = hashlib.sha1(filename.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, '%s.pickle' % digest)
+
+def stat_key(stat):
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def read_cache(cache_dir, filename, key):
+    try:
+        with open(cache_path(cache_dir, filename), 'rb') as f:
+            cached_key, fmt, plist = pickle.load(f)
+    except Exception:
+        return None
+
+    if cached_key != key:
+        return None
+
+    return plist, fmt
+
+def write_cache(cache_dir, filename, key, fmt, plist):
+    write_pickle(cache_dir, cache_path(cache_dir, filename), (key, fmt, plist))
+
+def read_plist(filename, cache_dir=None):
+    """
+    Reads the plist and returns it along with its format (None if the file
+    doesn't exist).  The cache is used instead of parsing the file if the
+    file's inode, size and modification time are unchanged.
+    """
     try:
-        f = open(filename, 'rb')
-        plist = plistlib.load(f)
+        with open(filename, 'rb') as f:
+            key = stat_key(os.fstat(f.fileno()))
+
+            if cache_dir:
+                cached = read_cache(cache_dir, filename, key)
+                if cached is not None:
+                    return cached
+
+            data = f.read()
     except IOError:
-        plist = {}
+        return {}, None
+
+    plist = plistlib.loads(data)
+    fmt = detect_format(data)
+
+    if cache_dir:
+        write_cache(cache_dir, filename, key, fmt, plist)
+
+    return plist, fmt
+
+def load_plist(module, filename, cache_dir=None):
+    try:
+        return read_plist(filename, cache_dir)
     except plistlib.InvalidFileException:
-        module.fail_json(msg="an invalid plist already exists")
+        module.fail_json(msg="an invalid plist already exists", dest=filename)
+
+def detect_format(data):
+    if data.startswith(b'bplist00'):
+        return plistlib.FMT_BINARY
+    else:
+        return plistlib.FMT_XML
+
+def target_format(requested, current):
+    if requested == 'binary':
+        return plistlib.FMT_BINARY
+    elif requested == 'xml':
+        return plistlib.FMT_XML
+    else:
+        # Retain the format of the existing file, defaulting to XML for new
+        # files
+        return current or plistlib.FMT_XML
 
-    changed = not equal(plist, working_values)
+def write_plist(module, filename, plist, backup=False, fsync=False,
+                fmt=plistlib.FMT_XML, cache_dir=None):
+    try:
+        data = plistlib.dumps(plist, fmt=fmt)
+    except Exception as e:
+        module.fail_json(msg="Can't change %s" % filename, error=str(e))
+
+    try:
+        with open(filename, 'rb') as f:
+            original = f.read()
+    except IOError:
+        original = None
+
+    # Avoid touching the file (and invalidating cfprefsd) if the serialised
+    # plist is identical to the one on disk
+    if data == original:
+        return False
+
+    if backup and original is not None:
+        module.backup_local(filename)
+
+    # Resolve symbolic links so that the plist they point to is replaced
+    # rather than the link itself
+    target = os.path.realpath(filename)
+    plist_dir = os.path.dirname(target)
+    temp_filename = None
+
+    try:
+        if not os.path.exists(plist_dir):
+            os.makedirs(plist_dir)
+
+        # Write the plist to a temporary file in the same directory and
+        # rename it into place so that the plist is never left truncated
+        temp_fd, temp_filename = tempfile.mkstemp(
+            prefix='.%s.' % os.path.basename(target), dir=plist_dir
+        )
+        with os.fdopen(temp_fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
 
-    if changed and not module.check_mode:
-        if backup:
-            module.backup_local(filename)
+            key = stat_key(os.fstat(f.fileno()))
 
+        if original is not None:
+            shutil.copymode(target, temp_filename)
+        else:
+            os.chmod(temp_filename, 0o644)
+
+        os.rename(temp_filename, target)
+        temp_filename = None
+
+        if fsync:
+            dir_fd = os.open(plist_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    except Exception as e:
+        module.fail_json(msg="Can't change %s" % filename, error=str(e))
+    finally:
+        if temp_filename and os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+    if cache_dir:
+        write_cache(cache_dir, filename, key, fmt, plist)
+
+    return True
+
+def do_plist(module, filename, values, backup=False, fsync=False,
+             requested_format='auto', cache_dir=None):
+    result = dict(changed=False)
+    diff = process_plist(
+        module, filename, [(values, result)], backup, fsync, requested_format,
+        cache_dir
+    )
+    return result['changed'], result['changes'], diff
+
+def do_plists(module, domains, backup=False, fsync=False,
+              requested_format='auto', cache_dir=None):
+    # Group the domains by the plist file they resolve to while retaining the
+    # order in which they were specified
+    grouped = {}
+    results = []
+    for domain in domains:
+        if not isinstance(domain, dict) or 'domain' not in domain:
+            module.fail_json(msg="each item in domains requires a domain key")
+        if not isinstance(domain.get('values'), dict):
+            module.fail_json(
+                msg="the values of domain %s must be a dict" % domain['domain']
+            )
+
+        filename = resolve_path(
+            domain['domain'], domain.get('container'), cache_dir
+        )
+        result = dict(domain=domain['domain'], dest=filename, changed=False)
+        grouped.setdefault(filename, []).append((domain['values'], result))
+        results.append(result)
+
+    # Read and write each plist file once, applying all related domains to it
+    diffs = []
+    for filename, entries in grouped.items():
+        diff = process_plist(
+            module, filename, entries, backup, fsync, requested_format,
+            cache_dir
+        )
+        if diff['before'] != diff['after']:
+            diffs.append(diff)
+
+    return results, diffs
+
+def process_plist(module, filename, entries, backup=False, fsync=False,
+                  requested_format='auto', cache_dir=None):
+    plist, current_fmt = load_plist(module, filename, cache_dir)
+    fmt = target_format(requested_format, current_fmt)
+    file_changes = []
+
+    # Determine and apply the changes required for each set of values in turn
+    # so that later values are compared against the result of earlier ones
+    for working_values, result in entries:
         try:
-            update(plist, working_values)
-            plist_dir = os.path.dirname(filename)
-            if not os.path.exists(plist_dir):
-                os.makedirs(plist_dir)
-            f = open(filename, 'wb')
-            plistlib.dump(plist, f)
-        except Exception as e:
-            module.fail_json(msg="Can't change %s" % filename, error=str(e))
-
-    return changed
-
-def equal(slave, master):
-    if isinstance(slave, dict) and isinstance(master, dict):
-        for key, value in master.items():
-            if not equal(slave.get(key), value):
-                return False
+            changes = diff_values(plist, working_values)
+        except (ValueError, TypeError) as e:
+            module.fail_json(
+                msg="Invalid values for %s" % filename, error=str(e)
+            )
+        apply_changes(plist, changes)
+        file_changes.extend(changes)
+
+        result['changed'] = bool(changes)
+        result['changes'] = [
+            dict(action=action, path=list(path))
+            for action, path, before, after in changes
+        ]
+
+    # Converting an existing file to the requested format is also a change
+    # for each set of values using the file
+    if current_fmt is not None and current_fmt != fmt:
+        for working_values, result in entries:
+            result['changed'] = True
+
+    file_changed = any(result['changed'] for working_values, result in entries)
+
+    if file_changed and not module.check_mode:
+        if not write_plist(
+            module, filename, plist, backup, fsync, fmt, cache_dir
+        ):
+            for working_values, result in entries:
+                result['changed'] = False
+
+    return dict(
+        before_header=filename,
+        after_header=filename,
+        before=''.join(
+            '%s: %s\n' % (format_path(path), format_value(before))
+            for action, path, before, after in file_changes
+            if action != 'added'
+        ),
+        after=''.join(
+            '%s: %s\n' % (format_path(path), format_value(after))
+            for action, path, before, after in file_changes
+        )
+    )
+
+def is_merge(value):
+    return isinstance(value, dict) and MERGE_KEY in value
+
+def resolve_value(value):
+    """
+    Converts working values containing absent markers or list merge
+    strategies into the plain value which should be stored when no existing
+    value is present.
+    """
+    if is_merge(value):
+        return merge_list([], value)
+    elif isinstance(value, dict):
+        return dict(
+            (key, resolve_value(item)) for key, item in value.items()
+            if item != ABSENT
+        )
     else:
-        return master == slave
+        return value
 
-    return True
+def merge_list(current, value):
+    """
+    Merges the items of a list merge strategy with the current list and
+    returns the resultant list.
+    """
+    strategy = value[MERGE_KEY]
+    items = value.get(VALUE_KEY)
+
+    if strategy == 'index':
+        if not isinstance(items, dict):
+            raise ValueError(
+                "the %s of the index strategy must be a dict" % VALUE_KEY
+            )
+        merged = list(current)
+        for index, item in sorted(items.items(), key=lambda i: int(i[0])):
+            index = int(index)
+            if index == len(merged):
+                merged.append(resolve_value(item))
+            elif -len(merged) <= index < len(merged):
+                merged[index] = resolve_value(item)
+            else:
+                raise ValueError("list index %d is out of range" % index)
+        return merged
+
+    if not isinstance(items, list):
+        raise ValueError(
+            "the %s of the %s strategy must be a list" % (VALUE_KEY, strategy)
+        )
+    items = [resolve_value(item) for item in items]
+
+    if strategy == 'replace':
+        return items
+    elif strategy == 'append-unique':
+        return list(current) + [
+            item for index, item in enumerate(items)
+            if item not in current and item not in items[:index]
+        ]
+    elif strategy == 'set':
+        return [item for item in current if item in items] + [
+            item for index, item in enumerate(items)
+            if item not in current and item not in items[:index]
+        ]
+    else:
+        raise ValueError(
+            "unsupported list merge strategy %s (choose from %s)" %
+            (strategy, ', '.join(MERGE_STRATEGIES))
+        )
+
+def same_type(current, value):
+    """
+    Determines whether two values are of the same plist type.  Integers and
+    reals are both treated as numbers since macOS stores many integer values
+    (e.g. the Dock tile size) as reals, while booleans remain distinct.
+    """
+    numbers = (int, float)
+    if type(current) in numbers and type(value) in numbers:
+        return True
+    return type(current) is type(value)
+
+def diff_values(plist, working_values, path=()):
+    """
+    Compares the working values against the plist in a single pass and
+    returns a list of (action, path, before, after) tuples describing each
+    key path which must change.  Actions are added, modified, type-changed
+    or removed.
+    """
+    changes = []
 
-def update(plist, working_values):
     for key, value in working_values.items():
-        if isinstance(value, dict):
-            plist[key] = update(plist.get(key, {}), value)
+        key_path = path + (key,)
+        present = key in plist if isinstance(plist, dict) else True
+
+        if value == ABSENT:
+            if isinstance(plist, list):
+                raise ValueError("list items may not be removed by index")
+            elif present:
+                changes.append(('removed', key_path, plist[key], None))
+            continue
+
+        if not present:
+            changes.append(('added', key_path, None, resolve_value(value)))
+            continue
+
+        current = plist[key]
+
+        if is_merge(value):
+            if value[MERGE_KEY] == 'index' and isinstance(current, list):
+                # Compare individual list items so that only the items which
+                # differ are changed
+                changes.extend(diff_indexes(current, value, key_path))
+                continue
+
+            merged = merge_list(
+                current if isinstance(current, list) else [], value
+            )
+            if not isinstance(current, list):
+                changes.append(('type-changed', key_path, current, merged))
+            elif merged != current:
+                changes.append(('modified', key_path, current, merged))
+        elif isinstance(current, dict) and isinstance(value, dict):
+            changes.extend(diff_values(current, value, key_path))
+        elif not same_type(current, value):
+            changes.append((
+                'type-changed', key_path, current, resolve_value(value)
+            ))
+        elif current != value:
+            changes.append(('modified', key_path, current, value))
+
+    return changes
+
+def diff_indexes(current, value, path):
+    """
+    Compares the items of an index list merge strategy against the current
+    list and returns the changes required as per diff_values.
+    """
+    items = value.get(VALUE_KEY)
+    if not isinstance(items, dict):
+        raise ValueError(
+            "the %s of the index strategy must be a dict" % VALUE_KEY
+        )
+
+    # Resolve negative indexes relative to the end of the current list
+    indexes = []
+    for index, item in items.items():
+        index = int(index)
+        if index < 0:
+            index += len(current)
+            if index < 0:
+                raise ValueError(
+                    "list index %d is out of range" % (index - len(current))
+                )
+        indexes.append((index, item))
+
+    changes = []
+    length = len(current)
+
+    for index, item in sorted(indexes, key=lambda i: i[0]):
+        if index < len(current):
+            changes.extend(diff_values(current, {index: item}, path))
+        elif index == length:
+            changes.append(
+                ('added', path + (index,), None, resolve_value(item))
+            )
+            length += 1
+        else:
+            raise ValueError("list index %d is out of range" % index)
+
+    return changes
+
+def apply_changes(plist, changes):
+    for action, path, before, after in changes:
+        parent = plist
+        for key in path[:-1]:
+            parent = parent[key]
+
+        if action == 'removed':
+            del parent[path[-1]]
+        elif action == 'added' and isinstance(parent, list):
+            parent.append(copy.deepcopy(after))
         else:
-            plist[key] = working_values[key]
+            parent[path[-1]] = copy.deepcopy(after)
 
     return plist
 
+def format_path(path):
+    return ' / '.join(str(key) for key in path)
+
+def format_value(value):
+    if isinstance(value, (dict, list)):
+        return repr(value)
+    elif isinstance(value, bytes):
+        return '<data %d bytes>' % len(value)
+    else:
+        return str(value)
+
 def main():
     module = AnsibleModule(
         argument_spec = dict(
-            dest = dict(required=True),
-            values = dict(required=True, type='dict'),
+            dest = dict(required=False),
+            values = dict(required=False, type='dict'),
+            domains = dict(required=False, type='list'),
             container = dict(required=False),
-            backup = dict(default='no', type='bool')
+            backup = dict(default='no', type='bool'),
+            fsync = dict(default='no', type='bool'),
+            format = dict(default='auto', choices=['auto', 'binary', 'xml']),
+            cache = dict(default='yes', type='bool')
         ),
+        mutually_exclusive = [['dest', 'domains'], ['values', 'domains']],
+        required_one_of = [['dest', 'domains']],
+        required_together = [['dest', 'values']],
         add_file_common_args = True,
         supports_check_mode = True,
     )
 
-    if (
-        not module.params['dest'].startswith('/') and
-        not module.params['dest'].startswith('~')
-    ):
-        if module.params['dest'] in ['NSGlobalDomain', 'Apple Global Domain']:
-            module.params['dest'] = os.path.expanduser(
-                '~/Library/Preferences/.GlobalPreferences.plist'
-            )
-        elif module.params['container']:
-            module.params['dest'] = os.path.expanduser(
-                '~/Library/Containers/%s/Data/Library/Preferences/%s.plist' %
-                (module.params['container'], module.params['dest'])
+    backup = module.params['backup']
+    fsync = module.params['fsync']
+    requested_format = module.params['format']
+
+    # Parsed plists are cached alongside Ansible's temporary files so that they
+    # may be re-used by later tasks and runs
+    cache_dir = None
+    if module.params['cache']:
+        remote_tmp = getattr(module, '_remote_tmp', None)
+        if remote_tmp:
+            cache_dir = os.path.join(
+                os.path.expanduser(remote_tmp), 'plist-cache'
             )
         else:
-            module.params['dest'] = os.path.expanduser(
-                '~/Library/Preferences/%s.plist' % module.params['dest']
-            )
-    else:
-        module.params['dest'] = os.path.expanduser(module.params['dest'])
+            cache_dir = os.path.expanduser(DEFAULT_CACHE_DIR)
+
+    if module.params['domains'] is not None:
+        results, diffs = do_plists(
+            module, module.params['domains'], backup, fsync, requested_format,
+            cache_dir
+        )
+        changed = any(result['changed'] for result in results)
+        module.exit_json(
+            results=results, changed=changed, diff=diffs, msg="OK"
+        )
+
+    module.params['dest'] = resolve_path(
+        module.params['dest'], module.params['container'], cache_dir
+    )
 
     dest = module.params['dest']
     values = module.params['values']
-    backup = module.params['backup']
 
-    changed = do_plist(module, dest, values, backup)
-
-    module.exit_json(dest=dest, changed=changed, msg="OK")
+    changed, changes, diff = do_plist(
+        module, dest, values, backup, fsync, requested_format, cache_dir
+    )
 
-# import module snippets
-from ansible.module_utils.basic import *
+    module.exit_json(
+        dest=dest, changed=changed, changes=changes, diff=diff, msg="OK"
+    )
 
 if __name__ == '__main__':
+    # import module snippets (only when run as a module so that the functions
+    # above may be imported by the extras scripts without Ansible)
+    from ansible.module_utils.basic import *
+
     main()